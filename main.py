@@ -1,21 +1,47 @@
 import os
-import json
+import orjson
 import logging
 import asyncio
 import io
 import random
-import matplotlib.pyplot as plt
+import re
+import time
+import functools
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from PIL import Image, ImageDraw, ImageFont
+from typing import List, Dict, Any, Optional, NamedTuple
 
 import gspread
 from google.oauth2.service_account import Credentials
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from aiohttp import web
 from aiogram import Bot, Dispatcher, types, F
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
 from aiogram.filters import Command
+from aiogram.methods import GetUpdates
+from aiogram.filters.callback_data import CallbackData
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, URLInputFile, ReplyKeyboardMarkup, KeyboardButton
+try:
+    import uvloop # Faster event loop where available (not on Windows)
+except ImportError:
+    uvloop = None
+try:
+    from google import genai # Optional: only needed for the AI trophy
+    from google.genai import types as gen_types
+except ImportError:
+    genai = None
 import random
 
 from dotenv import load_dotenv
@@ -28,10 +54,20 @@ BOT_TOKEN = os.getenv("BOT_TOKEN")
 SPREADSHEET_ID = os.getenv("SPREADSHEET_ID")
 GOOGLE_CREDS_JSON = os.getenv("GOOGLE_CREDS")
 ADMIN_ID = os.getenv("ADMIN_ID") # Optional: Telegram user ID of the admin
+REDIS_URL = os.getenv("REDIS_URL") # Optional: keeps FSM state (running rounds) across restarts
+WEBHOOK_URL = os.getenv("WEBHOOK_URL") # Optional: public HTTPS base URL, switches from polling to webhook mode
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") # Optional: secret token Telegram sends along with every update
+WEBHOOK_PATH = "/webhook"
+PORT = int(os.getenv("PORT", "8080"))
+HIGH_QUALITY_CHARTS = os.getenv("HIGH_QUALITY_CHARTS") == "1" # Optional: render /stats with matplotlib instead of Pillow
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY") # Optional: AI trophy for the winner after /beenden (needs google-genai)
+GEMINI_IMAGE_MODEL = os.getenv("GEMINI_IMAGE_MODEL", "imagen-3.0-generate-002")
 
 # --- Logging ---
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+if GEMINI_API_KEY and genai is None:
+    logger.warning("GEMINI_API_KEY is set but google-genai is not installed, AI trophies are disabled")
 
 # --- States ---
 class SetupStates(StatesGroup):
@@ -48,28 +84,240 @@ class GameStates(StatesGroup):
 class AdminStates(StatesGroup):
     waiting_for_rule_value = State()
 
+# --- Callback Data ---
+# Typed callback payloads: aiogram matches the prefix and unpacks the fields in one step
+class GameChoice(CallbackData, prefix="game"):
+    kind: str # "type", "soloist" or "winner"
+    value: str
+
+class Toggle(CallbackData, prefix="tg"):
+    kind: str # "re", "ann" or "extra"
+    value: str
+
+class EditRule(CallbackData, prefix="edit_rule"):
+    key: str
+
 # --- Google Sheets Setup ---
+SCOPES = ['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive']
+SHEETS_WORKERS = 8 # Parallel Sheets requests (thread pool size = HTTP connection pool size)
+CREDS_DICT = orjson.loads(GOOGLE_CREDS_JSON) if GOOGLE_CREDS_JSON else None
+# Service account key is parsed once at import
+CREDS = Credentials.from_service_account_info(CREDS_DICT, scopes=SCOPES) if CREDS_DICT else None
+
+class SheetsRetry(Retry):
+    # Idempotent requests (GET/PUT) retry on 429 and transient 5xx. Non-idempotent ones (POST:
+    # append, batchUpdate with row deletes) only retry on 429, which Google rejects unprocessed.
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if status_code == 429:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def get_backoff_time(self) -> float:
+        # urllib3 retries the first failure immediately; wait backoff_factor plus jitter from the first one on
+        errors = len(list(itertools.takewhile(lambda h: h.redirect_location is None, reversed(self.history))))
+        if errors == 0:
+            return 0
+        backoff = self.backoff_factor * (2 ** (errors - 1)) + random.random() * self.backoff_jitter
+        return float(min(self.backoff_max, backoff))
+
+# Authorized client and opened spreadsheets are reused for the whole process lifetime
+_client: Optional[gspread.Client] = None
+_spreadsheets: Dict[str, gspread.Spreadsheet] = {}
+
 def get_sheets_client():
-    creds_dict = json.loads(GOOGLE_CREDS_JSON)
-    scope = ['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive']
-    creds = Credentials.from_service_account_info(creds_dict, scopes=scope)
-    return gspread.authorize(creds)
-
-def get_or_create_daily_sheet(client, spreadsheet_id, players: List[str]):
-    sh = client.open_by_key(spreadsheet_id)
-    today_str = datetime.now().strftime("%d.%m.%y")
-    
-    try:
-        worksheet = sh.worksheet(today_str)
-    except gspread.WorksheetNotFound:
+    global _client
+    if _client is None:
+        _client = gspread.authorize(CREDS)
+        # Warm keep-alive connections for every worker thread; rate limits and transient server
+        # errors are retried with exponential backoff of 0.5s, 1s, 2s, 4s, 8s, each plus up to 0.5s jitter
+        # (a Retry-After header from Google takes precedence)
+        retry = SheetsRetry(total=5, backoff_factor=0.5, backoff_jitter=0.5, backoff_max=30,
+                            status_forcelist=[429, 500, 503], raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=SHEETS_WORKERS, pool_maxsize=SHEETS_WORKERS, max_retries=retry)
+        _client.http_client.session.mount("https://", adapter)
+    return _client
+
+def open_spreadsheet(client, spreadsheet_id) -> gspread.Spreadsheet:
+    # open_by_key costs a spreadsheets.get round-trip, so only do it once per key
+    sh = _spreadsheets.get(spreadsheet_id)
+    if sh is None:
+        sh = client.open_by_key(spreadsheet_id)
+        _spreadsheets[spreadsheet_id] = sh
+    return sh
+
+def ttl_cache(seconds: int):
+    # Per-process cache for Sheets reads that rarely change (rules, player list).
+    # Callers run in the _sheets() worker threads; a per-key lock makes concurrent misses
+    # wait for the one fetch in flight instead of all hitting the API.
+    def decorator(fn):
+        cache: Dict[tuple, tuple] = {}
+        locks: Dict[tuple, threading.Lock] = {}
+        # Bumped on every clear/put; a fetch that started before only returns its result, it
+        # doesn't store it, so an invalidation can't be undone by a read still in flight
+        generation = [0]
+
+        @functools.wraps(fn)
+        def wrapper(*args):
+            hit = cache.get(args)
+            if hit and hit[0] > time.monotonic():
+                return hit[1]
+            with locks.setdefault(args, threading.Lock()):
+                hit = cache.get(args)
+                if hit and hit[0] > time.monotonic():
+                    return hit[1]
+                started = generation[0]
+                value = fn(*args)
+                if generation[0] == started:
+                    cache[args] = (time.monotonic() + seconds, value)
+                return value
+
+        def cache_put(value, *args):
+            # Write-through after we changed the underlying data ourselves
+            generation[0] += 1
+            cache[args] = (time.monotonic() + seconds, value)
+
+        def cache_clear():
+            generation[0] += 1
+            cache.clear()
+
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_put = cache_put
+        return wrapper
+    return decorator
+
+@ttl_cache(300)
+def get_sheet_meta(sh) -> Dict[str, Dict[str, Any]]:
+    # title -> sheet properties (sheetId, gridProperties, ...) from one spreadsheets.get.
+    # Call get_sheet_meta.cache_clear() after adding or deleting worksheets.
+    resp = sh.fetch_sheet_metadata()
+    return {s["properties"]["title"]: s["properties"] for s in resp["sheets"]}
+
+def get_worksheet(sh, title: str) -> gspread.Worksheet:
+    # Like sh.worksheet(title), but built from the cached metadata instead of a new spreadsheets.get
+    props = get_sheet_meta(sh).get(title)
+    if props is None:
+        raise gspread.WorksheetNotFound(title)
+    return gspread.Worksheet(sh, props, sh.id, sh.client)
+
+async def _sheets(fn, *args, **kwargs):
+    # gspread is synchronous, run it in a worker thread so the event loop keeps serving updates
+    return await asyncio.to_thread(fn, *args, **kwargs)
+
+# Strong references to fire-and-forget tasks, asyncio only keeps weak ones
+_background_tasks = set()
+
+def run_in_background(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+def read_round_state(client, spreadsheet_id, today_str: str):
+    # Today's row count (plus the bock counter on first use) in a single values.batchGet,
+    # rules come from the cache and the bock counter lives in memory afterwards
+    global _bock_count
+    sh = open_spreadsheet(client, spreadsheet_id)
+    meta = get_sheet_meta(sh)
+    ranges = {today_str: f"'{today_str}'!A:A"}
+    if _bock_count is None:
+        ranges["Dashboard"] = f"Dashboard!{BOCK_CELL}"
+    titles = [t for t in ranges if t in meta]
+    values = {}
+    if titles:
+        resp = sh.values_batch_get([ranges[t] for t in titles], params={"valueRenderOption": "UNFORMATTED_VALUE"})
+        values = {t: vr.get("values", []) for t, vr in zip(titles, resp.get("valueRanges", []))}
+
+    rules = get_score_rules(client, spreadsheet_id)
+
+    if _bock_count is None:
+        bock_cell = values.get("Dashboard", [])
+        bock = bock_cell[0][0] if bock_cell and bock_cell[0] else 0
+        _bock_count = int(bock) if str(bock).isdigit() else 0
+
+    worksheet = get_worksheet(sh, today_str) if today_str in meta else None
+    return rules, _bock_count, worksheet, len(values.get(today_str, []))
+
+def daily_sheet_headers(players: List[str]) -> List[str]:
+    # "Bock" marks a doubled round, "Neue Bockrunden" the rounds it granted, so /undo can reverse both
+    return ["Zeit", "Spiel-Typ", "Gewinner", "Punkte"] + players + ["Bock", "Neue Bockrunden"]
+
+def log_round(client, spreadsheet_id, today_str: str, worksheet, filled_rows: int, players: List[str], row: list, new_bock: Optional[int] = None) -> int:
+    # Header (for a new day), the round itself and the bock counter go out in one values.batchUpdate.
+    # Returns the sheet row the round was written to.
+    global _bock_count
+    sh = open_spreadsheet(client, spreadsheet_id)
+    data = []
+    if worksheet is None:
         worksheet = sh.add_worksheet(title=today_str, rows="100", cols="20")
-        headers = ["Zeit", "Spiel-Typ", "Gewinner", "Punkte"] + players
-        worksheet.append_row(headers)
-    
-    return worksheet
+        get_sheet_meta.cache_clear()
+        data.append({"range": f"'{today_str}'!A1", "values": [daily_sheet_headers(players)]})
+        filled_rows = 1
+
+    next_row = filled_rows + 1
+    if next_row > worksheet.row_count:
+        worksheet.append_rows([row], value_input_option="RAW")  # values.update can't grow the grid, append can
+        get_sheet_meta.cache_clear()  # row count changed
+    else:
+        data.append({"range": f"'{today_str}'!A{next_row}", "values": [row]})
+
+    if new_bock is not None:
+        data.append({"range": f"Dashboard!{BOCK_CELL}", "values": [[new_bock]]})
+
+    if data:
+        sh.values_batch_update({"valueInputOption": "RAW", "data": data})
+    bump_day_version(today_str)
+    if new_bock is not None:
+        _bock_count = new_bock
+    return next_row
+
+def undo_last_round(client, spreadsheet_id, today_str: str, players: List[str]) -> Optional[int]:
+    # Deletes today's last round and reverts its bock adjustment. Returns the restored bock
+    # count, or None if there was nothing to undo. Raises WorksheetNotFound without a day sheet.
+    global _bock_count
+    sh = open_spreadsheet(client, spreadsheet_id)
+    meta = get_sheet_meta(sh)
+    if today_str not in meta:
+        raise gspread.WorksheetNotFound(today_str)
+
+    # Header, column A (row count) and the two bock columns where today's header should have them
+    bock_col = len(daily_sheet_headers(players)) - 1
+    bock_range = f"{gspread.utils.rowcol_to_a1(1, bock_col)[:-1]}:{gspread.utils.rowcol_to_a1(1, bock_col + 1)[:-1]}"
+    resp = sh.values_batch_get([f"'{today_str}'!1:1", f"'{today_str}'!A:A", f"'{today_str}'!{bock_range}"],
+                               params={"valueRenderOption": "UNFORMATTED_VALUE"})
+    header, col_a, bock_cols = (vr.get("values", []) for vr in resp.get("valueRanges", []))
+    n_rows = len(col_a)
+    if n_rows <= 1:
+        return None
 
+    current_bock = get_bock_count(client, spreadsheet_id)
+    new_bock = current_bock
+    header = header[0] if header else []
+    if header[bock_col - 1:bock_col + 1] == ["Bock", "Neue Bockrunden"] and len(bock_cols) >= n_rows:
+        last = bock_cols[n_rows - 1] + [0, 0]
+        new_bock = max(0, current_bock + int(last[0] or 0) - int(last[1] or 0))
+
+    requests = [{"deleteDimension": {"range": {
+        "sheetId": meta[today_str]["sheetId"], "dimension": "ROWS", "startIndex": n_rows - 1, "endIndex": n_rows
+    }}}]
+    if new_bock != current_bock and "Dashboard" in meta:
+        requests.append({"updateCells": {
+            "range": gspread.utils.a1_range_to_grid_range(BOCK_CELL, meta["Dashboard"]["sheetId"]),
+            "rows": [{"values": [{"userEnteredValue": {"numberValue": new_bock}}]}],
+            "fields": "userEnteredValue"
+        }})
+    sh.batch_update({"requests": requests})
+    meta[today_str]["gridProperties"]["rowCount"] -= 1
+    bump_day_version(today_str)
+    reset_dashboard_stats()  # row numbers shifted, recount on the next dashboard update
+    _bock_count = new_bock
+    return new_bock
+
+# Sheet row of every rule key, filled by get_rules so edits don't need a findall search
+_rules_rows: Dict[str, int] = {}
+
+@ttl_cache(60)
 def get_rules(client, spreadsheet_id):
-    sh = client.open_by_key(spreadsheet_id)
+    sh = open_spreadsheet(client, spreadsheet_id)
     default_rules = {
         "SoloMultiplier": 3,
         "Fuchs": 1,
@@ -81,32 +329,50 @@ def get_rules(client, spreadsheet_id):
     }
     
     try:
-        rules_sheet = sh.worksheet("Rules")
-        data = rules_sheet.get_all_records()
+        rules_sheet = get_worksheet(sh, "Rules")
+        # Plain values instead of get_all_records; unformatted so numbers come back as numbers
+        data = rules_sheet.get_values(value_render_option=gspread.utils.ValueRenderOption.unformatted)[1:]
         if not data:
             headers = ["Key", "Value"]
             rows = [[k, v] for k, v in default_rules.items()]
             rules_sheet.update(range_name='A1', values=[headers] + rows)
             rules_sheet.format("A1:B1", {"textFormat": {"bold": True}})
+            _rules_rows.clear()
+            _rules_rows.update({k: i for i, k in enumerate(default_rules, start=2)})
             return default_rules
             
-        rules = {row['Key']: row['Value'] for row in data}
+        rules = {row[0]: row[1] if len(row) > 1 else "" for row in data if row and row[0]}
+        _rules_rows.clear()
+        _rules_rows.update({row[0]: i for i, row in enumerate(data, start=2) if row and row[0]})
         return rules
     except gspread.WorksheetNotFound:
         rules_sheet = sh.add_worksheet(title="Rules", rows="20", cols="2")
+        get_sheet_meta.cache_clear()
         headers = ["Key", "Value"]
         rows = [[k, v] for k, v in default_rules.items()]
         rules_sheet.update(range_name='A1', values=[headers] + rows)
         rules_sheet.format("A1:B1", {"textFormat": {"bold": True}})
+        _rules_rows.clear()
+        _rules_rows.update({k: i for i, k in enumerate(default_rules, start=2)})
         return default_rules
 
+class ScoreRules(NamedTuple):
+    # The rule values scoring needs, already converted to int
+    base: int
+    solo_mult: int
+
+@ttl_cache(60)
+def get_score_rules(client, spreadsheet_id) -> ScoreRules:
+    rules = get_rules(client, spreadsheet_id)
+    return ScoreRules(int(rules.get("BasePoint", 1)), int(rules.get("SoloMultiplier", 3)))
+
 # --- Scoring Logic ---
-def calculate_points(game_data: Dict[str, Any], rules: Dict[str, Any], players: List[str], is_bock: bool = False) -> Dict[str, int]:
-    base = int(rules.get("BasePoint", 1))
+def calculate_points(game_data: Dict[str, Any], rules: ScoreRules, players: List[str], is_bock: bool = False) -> Dict[str, int]:
+    base = rules.base
     
     # Announcements (Ansagen) double the score
     anns = game_data.get("announcements", [])
-    multiplier = 2 ** len(anns)
+    multiplier = 1 << len(anns)
     
     # Extra points (Absagen/Sonderpunkte) add points
     extras = game_data.get("extra_points", []).copy()
@@ -120,59 +386,82 @@ def calculate_points(game_data: Dict[str, Any], rules: Dict[str, Any], players:
     if is_bock:
         round_points *= 2
     
-    scores = {p: 0 for p in players}
-    
     if game_data["type"] == "Normal":
-        re_team = game_data["re_players"]
-        kontra_team = [p for p in players if p not in re_team]
-        
-        if game_data["winner_team"] == "Re":
-            for p in re_team: scores[p] = round_points
-            for p in kontra_team: scores[p] = -round_points
-        else:
-            for p in re_team: scores[p] = -round_points
-            for p in kontra_team: scores[p] = round_points
+        re_team = frozenset(game_data["re_players"])
+        sign = 1 if game_data["winner_team"] == "Re" else -1
+        return {p: (sign if p in re_team else -sign) * round_points for p in players}
             
     elif game_data["type"] == "Solo":
         soloist = game_data["soloist"]
-        others = [p for p in players if p != soloist]
-        solo_mult = int(rules.get("SoloMultiplier", 3))
-        
-        if game_data["winner_team"] == "Soloist":
-            scores[soloist] = round_points * solo_mult
-            for p in others: scores[p] = -round_points
-        else:
-            scores[soloist] = -(round_points * solo_mult)
-            for p in others: scores[p] = round_points
+        solo_mult = rules.solo_mult
+        sign = 1 if game_data["winner_team"] == "Soloist" else -1
+        return {p: sign * round_points * solo_mult if p == soloist else -sign * round_points for p in players}
             
-    return scores
+    return {p: 0 for p in players}
 
 # --- Bot Initialization ---
-bot = Bot(token=BOT_TOKEN)
-dp = Dispatcher()
+def create_storage() -> BaseStorage:
+    if REDIS_URL:
+        from aiogram.fsm.storage.redis import RedisStorage
+        return RedisStorage.from_url(REDIS_URL)
+    return MemoryStorage()
+
+# One keep-alive connection pool for all Bot API calls, sized to what SendLimiter lets through
+# (+1 for the long-poll). orjson (de)serializes every Telegram request and update, incl. webhook bodies.
+SEND_LIMIT = 28
+bot_session = AiohttpSession(limit=SEND_LIMIT + 1, json_loads=orjson.loads, json_dumps=lambda obj: orjson.dumps(obj).decode())
+bot = Bot(token=BOT_TOKEN, session=bot_session)
+dp = Dispatcher(storage=create_storage())
+
+class SendLimiter(BaseRequestMiddleware):
+    # Caps concurrent outgoing Bot API calls below Telegram's ~30 msg/s so bursts queue here
+    # instead of running into 429s. The long-poll getUpdates is not counted.
+    def __init__(self, limit: int = SEND_LIMIT):
+        self.sem = asyncio.Semaphore(limit)
+
+    async def __call__(self, make_request, bot, method):
+        if isinstance(method, GetUpdates):
+            return await make_request(bot, method)
+        async with self.sem:
+            return await make_request(bot, method)
+
+bot.session.middleware(SendLimiter())
 
 # --- Persistence Helpers ---
+# Bock counter is loaded from Dashboard!F1 once and kept in memory afterwards. The cell sits
+# outside A:D, which update_dashboard clears and rewrites, so the count survives a restart.
+BOCK_CELL = "F1"
+_bock_count: Optional[int] = None
+_bock_lock = asyncio.Lock()
+
 def get_bock_count(client, spreadsheet_id):
-    sh = client.open_by_key(spreadsheet_id)
+    global _bock_count
+    if _bock_count is not None:
+        return _bock_count
+    sh = open_spreadsheet(client, spreadsheet_id)
     try:
-        dashboard = sh.worksheet("Dashboard")
-        val = dashboard.acell('B7').value
-        return int(val) if val and val.isdigit() else 0
+        dashboard = get_worksheet(sh, "Dashboard")
+        val = dashboard.acell(BOCK_CELL).value
+        _bock_count = int(val) if val and val.isdigit() else 0
+        return _bock_count
     except:
         return 0
 
 def set_bock_count(client, spreadsheet_id, count):
-    sh = client.open_by_key(spreadsheet_id)
+    global _bock_count
+    _bock_count = count
+    sh = open_spreadsheet(client, spreadsheet_id)
     try:
-        dashboard = sh.worksheet("Dashboard")
-        dashboard.update_acell('B7', count)
+        dashboard = get_worksheet(sh, "Dashboard")
+        dashboard.update_acell(BOCK_CELL, count)
     except:
         pass
 
+@ttl_cache(300) # Only changes through process_players / player reset, both update the cache
 def get_players_from_dashboard(client, spreadsheet_id):
-    sh = client.open_by_key(spreadsheet_id)
+    sh = open_spreadsheet(client, spreadsheet_id)
     try:
-        dashboard = sh.worksheet("Dashboard")
+        dashboard = get_worksheet(sh, "Dashboard")
         players = []
         for p in dashboard.col_values(1)[1:]:
             if not p or str(p).startswith("🏆") or str(p).startswith("📉") or str(p).startswith("🎰") or str(p).startswith("📡") or str(p).startswith("📜"):
@@ -182,6 +471,66 @@ def get_players_from_dashboard(client, spreadsheet_id):
     except gspread.WorksheetNotFound:
         return []
 
+def load_all_daily_values(sh) -> Dict[str, List[List[str]]]:
+    # One values.batchGet for every daily sheet instead of one get_all_records per sheet.
+    # Each entry is the raw grid with the header row first.
+    titles = [t for t in get_sheet_meta(sh) if t not in ["Dashboard", "Rules"]]
+    if not titles:
+        return {}
+    resp = sh.values_batch_get([f"'{t}'!A:Z" for t in titles])
+    return {title: vr.get("values", []) for title, vr in zip(titles, resp.get("valueRanges", []))}
+
+# Day sheet title -> local write counter, and the last grid read at that counter. Rounds only
+# change through log_round/undo_last_round here, so an unchanged counter means the grid is current.
+_day_versions: Dict[str, int] = {}
+_day_cache: Dict[str, tuple] = {}
+DAY_CACHE_SECONDS = 300 # Re-read anyway after this, in case someone edited the sheet by hand
+
+def bump_day_version(title: str):
+    _day_versions[title] = _day_versions.get(title, 0) + 1
+
+def read_day_values(sh, title: str) -> List[List[str]]:
+    # Raw grid of one day sheet, shared by settlement, /beenden and the chart
+    version = _day_versions.get(title, 0)
+    hit = _day_cache.get(title)
+    if hit and hit[0] == version and hit[1] > time.monotonic():
+        return hit[2]
+    values = get_worksheet(sh, title).get_values()
+    _day_cache[title] = (version, time.monotonic() + DAY_CACHE_SECONDS, values)
+    return values
+
+def delete_daily_sheets(sh):
+    # All day sheets go in one spreadsheets.batchUpdate (one write against the quota)
+    requests = [{"deleteSheet": {"sheetId": props["sheetId"]}}
+                for title, props in get_sheet_meta(sh).items() if title not in ["Dashboard", "Rules"]]
+    if requests:
+        sh.batch_update({"requests": requests})
+    get_sheet_meta.cache_clear()
+    _day_cache.clear()
+
+def player_columns(header: List[str], players: List[str]) -> Dict[str, int]:
+    return {p: header.index(p) for p in players if p in header}
+
+def player_matrix(values: List[List[str]], players: List[str]):
+    # rounds x players point matrix of one daily sheet plus a mask of the non-empty cells
+    rows = values[1:] if values else []
+    points = np.zeros((len(rows), len(players)), dtype=np.int32)
+    filled = np.zeros((len(rows), len(players)), dtype=bool)
+    if not rows:
+        return points, filled
+    cols = player_columns(values[0], players)
+    idx = [j for j, p in enumerate(players) if p in cols]
+    if not idx:
+        return points, filled
+    # The API drops trailing empty cells: pad the rows once, then convert all player cells in a single numpy cast
+    src = [cols[players[j]] for j in idx]
+    width = max(src) + 1
+    cells = np.array([r[:width] + [""] * (width - len(r)) for r in rows])[:, src]
+    mask = cells != ""
+    filled[:, idx] = mask
+    points[:, idx] = np.where(mask, cells, "0").astype(np.int32)
+    return points, filled
+
 def get_main_menu():
     kb = [
         [KeyboardButton(text="🃏 Spiel eintragen"), KeyboardButton(text="📊 Statistik")],
@@ -191,51 +540,152 @@ def get_main_menu():
     ]
     return ReplyKeyboardMarkup(keyboard=kb, resize_keyboard=True)
 
+# One figure reused for every matplotlib chart, created on first use; the lock keeps worker threads apart
+_FIG = _AX = None
+_chart_lock = threading.Lock()
+
+CHART_BINS = 1000 # Horizontal resolution above which the chart lines get downsampled
+
+def m4_downsample(y: np.ndarray, bins: int):
+    # M4 aggregation: per pixel column keep first, min, max and last, which draws the same line
+    # as all points would. Returns (x, y) with 4 samples per bin.
+    edges = np.linspace(0, len(y), bins + 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:] - 1
+    x = np.stack([starts, (starts + ends) // 2, (starts + ends) // 2, ends], axis=1).ravel()
+    v = np.stack([y[starts], np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts), y[ends]], axis=1).ravel()
+    return x, v
+
 def generate_stats_chart(players: List[str], spreadsheet_id: str):
     try:
         client = get_sheets_client()
-        sh = client.open_by_key(spreadsheet_id)
+        sh = open_spreadsheet(client, spreadsheet_id)
         
         # We only plot the CURRENT day's progress for a "Live" feel
         today_str = datetime.now().strftime("%d.%m.%y")
         try:
-            ws = sh.worksheet(today_str)
-            records = ws.get_all_records()
+            values = read_day_values(sh, today_str)
         except:
             return None # No data yet
             
-        if not records: return None
+        if len(values) < 2: return None
         
-        # Calculate cumulative points per player
-        history = {p: [0] for p in players}
-        for row in records:
-            for p in players:
-                pts = int(row.get(p, 0))
-                history[p].append(history[p][-1] + pts)
+        # Cumulative points per player, starting at 0 before the first round
+        arr, _ = player_matrix(values, players)
+        cum = np.vstack([np.zeros((1, len(players)), dtype=np.int32), np.cumsum(arr, axis=0)])
         
+        if HIGH_QUALITY_CHARTS:
+            return draw_chart_mpl(cum, players, today_str)
+        return draw_chart_pil(cum, players, today_str)
+    except Exception as e:
+        logger.error(f"Chart error: {e}")
+        return None
+
+def draw_chart_mpl(cum: np.ndarray, players: List[str], today_str: str) -> io.BytesIO:
+    global _FIG, _AX
+    buf = io.BytesIO()
+    with _chart_lock:
+        if _FIG is None:
+            # matplotlib is only loaded with HIGH_QUALITY_CHARTS; style is resolved once
+            import matplotlib
+            matplotlib.use('Agg') # Headless server, no GUI backend probing
+            import matplotlib.pyplot as plt
+            plt.style.use('dark_background') # Premium Look
+            _FIG, _AX = plt.subplots(figsize=(10, 6))
+
         # Plotting
-        plt.figure(figsize=(10, 6))
-        plt.style.use('dark_background') # Premium Look
-        
-        for p in players:
-            plt.plot(history[p], label=p, marker='o', linewidth=2)
+        _AX.cla()
+        for i, p in enumerate(players):
+            if len(cum) > 4 * CHART_BINS:
+                _AX.plot(*m4_downsample(cum[:, i], CHART_BINS), label=p, linewidth=2)
+            else:
+                _AX.plot(cum[:, i], label=p, marker='o', linewidth=2)
             
-        plt.axhline(0, color='white', linestyle='--', alpha=0.3)
-        plt.title(f"Punkteverlauf - {today_str}", fontsize=14, color='#f1c40f', pad=20)
-        plt.xlabel("Runde", fontsize=10)
-        plt.ylabel("Punkte", fontsize=10)
-        plt.grid(True, alpha=0.1)
-        plt.legend()
+        _AX.axhline(0, color='white', linestyle='--', alpha=0.3)
+        _AX.set_title(f"Punkteverlauf - {today_str}", fontsize=14, color='#f1c40f', pad=20)
+        _AX.set_xlabel("Runde", fontsize=10)
+        _AX.set_ylabel("Punkte", fontsize=10)
+        _AX.grid(True, alpha=0.1)
+        _AX.legend()
         
         # Save to Buffer
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=100)
-        buf.seek(0)
-        plt.close()
-        return buf
-    except Exception as e:
-        logger.error(f"Chart error: {e}")
-        return None
+        _FIG.savefig(buf, format='png', dpi=100)
+    buf.seek(0)
+    return buf
+
+# Same dark look as the matplotlib chart, drawn directly with Pillow (no text layout engine)
+CHART_COLORS = ["#8dd3c7", "#feffb3", "#bfbbd9", "#fa8174", "#81b1d2", "#fdb462"]
+CHART_W, CHART_H = 1000, 600
+CHART_BOX = (80, 70, 860, 540) # left, top, right, bottom of the plot area
+_FONT = ImageFont.load_default(size=14)
+_TITLE_FONT = ImageFont.load_default(size=20)
+
+def _rotated_label(text: str) -> Image.Image:
+    # Pillow can't draw rotated text directly: render it on its own layer and turn that by 90°
+    l, t, r, b = _FONT.getbbox(text)
+    layer = Image.new("RGBA", (r - l, b - t))
+    ImageDraw.Draw(layer).text((-l, -t), text, fill="white", font=_FONT)
+    return layer.rotate(90, expand=True)
+
+_Y_LABEL = _rotated_label("Punkte") # Static, rendered once
+
+def draw_chart_pil(cum: np.ndarray, players: List[str], today_str: str) -> io.BytesIO:
+    img = Image.new("RGB", (CHART_W, CHART_H), "black")
+    draw = ImageDraw.Draw(img)
+    left, top, right, bottom = CHART_BOX
+
+    lo, hi = min(int(cum.min()), 0), max(int(cum.max()), 0)
+    if lo == hi: hi = lo + 1
+    n = max(len(cum) - 1, 1)
+    to_x = lambda i: left + (right - left) * i / n
+    to_y = lambda v: bottom - (bottom - top) * (v - lo) / (hi - lo)
+
+    # Grid, y ticks and the zero line
+    raw = (hi - lo) / 5
+    mag = 10 ** int(np.floor(np.log10(raw))) if raw >= 1 else 1
+    step = next(m * mag for m in (1, 2, 5, 10) if m * mag >= raw)
+    for v in range(-(-lo // step) * step, hi + 1, step):
+        y = to_y(v)
+        draw.line([(left, y), (right, y)], fill="#1a1a1a")
+        draw.text((left - 8, y), str(v), fill="white", font=_FONT, anchor="rm")
+    for i in np.unique(np.linspace(0, n, min(n, 10) + 1).astype(int)):
+        draw.text((to_x(i), bottom + 8), str(i), fill="white", font=_FONT, anchor="mt")
+    y0 = to_y(0)
+    for x in range(left, right, 12):
+        draw.line([(x, y0), (min(x + 6, right), y0)], fill="#4d4d4d")
+    draw.rectangle(CHART_BOX, outline="white")
+
+    # One polyline per player, M4-reduced for long evenings
+    for i, p in enumerate(players):
+        color = CHART_COLORS[i % len(CHART_COLORS)]
+        if len(cum) > 4 * CHART_BINS:
+            xs, ys = m4_downsample(cum[:, i], CHART_BINS)
+        else:
+            xs, ys = np.arange(len(cum)), cum[:, i]
+        points = [(to_x(x), to_y(v)) for x, v in zip(xs.tolist(), ys.tolist())]
+        draw.line(points, fill=color, width=2, joint="curve")
+        if len(cum) <= 100:
+            for x, y in points:
+                draw.ellipse((x - 3, y - 3, x + 3, y + 3), fill=color)
+        # Legend
+        ly = top + 10 + i * 24
+        draw.line([(right + 20, ly), (right + 45, ly)], fill=color, width=3)
+        draw.text((right + 52, ly), p, fill="white", font=_FONT, anchor="lm")
+
+    draw.text((CHART_W / 2, 30), f"Punkteverlauf - {today_str}", fill="#f1c40f", font=_TITLE_FONT, anchor="mm")
+    draw.text(((left + right) / 2, CHART_H - 25), "Runde", fill="white", font=_FONT, anchor="mm")
+    img.paste(_Y_LABEL, (18 - _Y_LABEL.width // 2, (top + bottom - _Y_LABEL.height) // 2), _Y_LABEL)
+
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    buf.seek(0)
+    return buf
+
+# Characters that open an entity in Telegram's legacy Markdown
+_MD_RE = re.compile(r"([_*`\[])")
+
+def md(text) -> str:
+    # Escape player names and other free text before it goes into a Markdown message
+    return _MD_RE.sub(r"\\\1", str(text))
 
 def format_rule_name(key: str) -> str:
     mapping = {
@@ -249,45 +699,68 @@ def format_rule_name(key: str) -> str:
     }
     return mapping.get(key, key)
 
-def update_dashboard(client, spreadsheet_id, players: List[str], last_action: str = None):
-    sh = client.open_by_key(spreadsheet_id)
+# All-time dashboard stats, kept in memory and only topped up with each newly logged round.
+# "rows" remembers which sheet rows are already counted; reset_dashboard_stats() forces a full recompute.
+_dashboard_stats: Optional[Dict[str, Any]] = None
+_dashboard_lock = threading.Lock()
+DASHBOARD_STATS_SECONDS = 300 # Recount from the sheets after this, picks up manual edits and missed rounds
+
+def reset_dashboard_stats():
+    global _dashboard_stats
+    with _dashboard_lock:
+        _dashboard_stats = None
+
+def dashboard_stats(sh, players: List[str], new_round: Optional[tuple] = None):
+    # Returns (totals, games_count, wins) as per-player arrays. new_round is (sheet title, sheet row, scores).
+    global _dashboard_stats
+    with _dashboard_lock:
+        stats = _dashboard_stats
+        # Stale when expired or when the set of day sheets no longer matches the counted ones
+        if (stats is None or stats["players"] != tuple(players) or stats["expires"] < time.monotonic()
+                or stats["rows"].keys() != {t for t in get_sheet_meta(sh) if t not in ["Dashboard", "Rules"]}):
+            # Full recompute: all daily sheets in one batchGet, summed as one matrix
+            daily_values = load_all_daily_values(sh)
+            mats = [player_matrix(values, players)[0] for values in daily_values.values()]
+            mat = np.vstack(mats) if mats else np.zeros((0, len(players)), dtype=np.int32)
+            stats = {
+                "players": tuple(players),
+                "totals": mat.sum(axis=0),
+                "games": (mat != 0).sum(axis=0),
+                "wins": (mat > 0).sum(axis=0),
+                "rows": {title: set(range(2, len(values) + 1)) for title, values in daily_values.items()},
+                "expires": time.monotonic() + DASHBOARD_STATS_SECONDS
+            }
+            _dashboard_stats = stats
+        elif new_round:
+            title, sheet_row, scores = new_round
+            counted = stats["rows"].setdefault(title, set())
+            if sheet_row not in counted:
+                pts = np.array([scores.get(p, 0) for p in players])
+                stats["totals"] = stats["totals"] + pts
+                stats["games"] = stats["games"] + (pts != 0)
+                stats["wins"] = stats["wins"] + (pts > 0)
+                counted.add(sheet_row)
+        return stats["totals"], stats["games"], stats["wins"]
+
+def update_dashboard(client, spreadsheet_id, players: List[str], last_action: str = None, new_round: Optional[tuple] = None, hhmm: Optional[str] = None):
+    sh = open_spreadsheet(client, spreadsheet_id)
     try:
-        dashboard = sh.worksheet("Dashboard")
+        dashboard = get_worksheet(sh, "Dashboard")
     except gspread.WorksheetNotFound:
         dashboard = sh.add_worksheet(title="Dashboard", rows="50", cols="10")
+        get_sheet_meta.cache_clear()
     
-    # Calculate All-Time Stats & Cumulative Data for Chart
-    totals = {p: 0 for p in players}
-    games_count = {p: 0 for p in players}
-    wins = {p: 0 for p in players}
-    
-    for ws in sh.worksheets():
-        if ws.title in ["Dashboard", "Rules"]: continue
-        try:
-            data = ws.get_all_records()
-            for row in data:
-                for p in players:
-                    pts = int(row.get(p, 0))
-                    totals[p] += pts
-                    if pts != 0:
-                        games_count[p] += 1
-                        if pts > 0: wins[p] += 1
-        except: continue
+    # All-Time Stats (incremental after the first full read)
+    sums, games, won = dashboard_stats(sh, players, new_round)
+    win_rate = np.divide(won * 100, games, out=np.zeros(len(players)), where=games > 0)
 
     # Determine MVP & Pechvogel
-    mvp = max(totals, key=totals.get) if any(totals.values()) else None
-    pechvogel = min(totals, key=totals.get) if any(totals.values()) else None
+    mvp = players[int(sums.argmax())] if sums.any() else None
+    pechvogel = players[int(sums.argmin())] if sums.any() else None
 
     # Prepare Content using Suit Icons
     header = [['Spieler 🃏', 'Gesamt ♣️', 'Quote 💎', 'Spiele ♠️']]
-    rows = []
-    for p in players:
-        wr = (wins[p] / games_count[p] * 100) if games_count[p] > 0 else 0
-        rows.append([p, totals[p], f"{wr:.1f}%", games_count[p]])
-    
-    # Clear and Update Data
-    dashboard.clear()
-    dashboard.update(range_name='A1', values=header + rows)
+    rows = [[p, t, f"{wr:.1f}%", g] for p, t, wr, g in zip(players, sums.tolist(), win_rate.tolist(), games.tolist())]
     
     # Highlights Section
     start_row = len(rows) + 3
@@ -300,76 +773,166 @@ def update_dashboard(client, spreadsheet_id, players: List[str], last_action: st
     ]
     
     if last_action:
-        highlight_data.append(['📡 LIVE-TICKER', f"{datetime.now().strftime('%H:%M')} - {last_action}"])
+        highlight_data.append(['📡 LIVE-TICKER', f"{hhmm or datetime.now().strftime('%H:%M')} - {last_action}"])
     else:
         highlight_data.append(['📡 LIVE-TICKER', "Warte auf Action... 🃏"])
 
-    dashboard.update(range_name=f'A{start_row}', values=highlight_data)
-    
+    # Rules Display
+    rules = get_rules(client, spreadsheet_id)
+    rules_start_row = start_row + len(highlight_data) + 2
+    rules_header = [['📜 AKTUELLER REGELSATZ', 'Wert']]
+    rules_rows = [[format_rule_name(k), v] for k, v in rules.items()]
+
+    # Clear old values (A:D only, the bock counter lives in BOCK_CELL), then table, highlights
+    # and rules in one values.batchUpdate
+    sh.values_batch_clear(body={"ranges": ["'Dashboard'!A:D"]})
+    sh.values_batch_update({
+        "valueInputOption": "RAW",
+        "data": [
+            {"range": "'Dashboard'!A1", "values": header + rows},
+            {"range": f"'Dashboard'!A{start_row}", "values": highlight_data},
+            {"range": f"'Dashboard'!A{rules_start_row}", "values": rules_header + rules_rows},
+        ]
+    })
+
     # --- PREMIUM STYLING ---
-    # ... (same styling as before)
-    try:
-        # Define Colors
-        FELT_GREEN = {"red": 11/255, "green": 83/255, "blue": 69/255}
-        TEXT_WHITE = {"red": 1.0, "green": 1.0, "blue": 1.0}
-        GOLD = {"red": 241/255, "green": 196/255, "blue": 15/255}
-        PECH_RED = {"red": 250/255, "green": 219/255, "blue": 216/255}
-        ZEBRA_LIGHT = {"red": 233/255, "green": 247/255, "blue": 239/255}
-
-        # 1. Header Styling
-        dashboard.format("A1:D1", {
-            "backgroundColor": FELT_GREEN,
-            "textFormat": {"foregroundColor": TEXT_WHITE, "bold": True, "fontSize": 11},
-            "horizontalAlignment": "CENTER"
-        })
-
-        # 2. Zebra Stripes & Borders
-        for i in range(len(rows)):
-            cell_range = f"A{i+2}:D{i+2}"
+    # Every format and the freeze go out as one spreadsheets.batchUpdate, kept apart from the values
+    FELT_GREEN = {"red": 11/255, "green": 83/255, "blue": 69/255}
+    TEXT_WHITE = {"red": 1.0, "green": 1.0, "blue": 1.0}
+    GOLD = {"red": 241/255, "green": 196/255, "blue": 15/255}
+    PECH_RED = {"red": 250/255, "green": 219/255, "blue": 216/255}
+    ZEBRA_LIGHT = {"red": 233/255, "green": 247/255, "blue": 239/255}
+    BAND = {
+        "backgroundColor": FELT_GREEN,
+        "textFormat": {"foregroundColor": TEXT_WHITE, "bold": True},
+        "horizontalAlignment": "CENTER"
+    }
+
+    def fmt(a1: str, cell_format: Dict[str, Any]) -> Dict[str, Any]:
+        return {"repeatCell": {
+            "range": gspread.utils.a1_range_to_grid_range(a1, dashboard.id),
+            "cell": {"userEnteredFormat": cell_format},
+            "fields": f"userEnteredFormat({','.join(cell_format)})"
+        }}
+
+    # 1. Header Styling
+    requests = [fmt("A1:D1", {
+        "backgroundColor": FELT_GREEN,
+        "textFormat": {"foregroundColor": TEXT_WHITE, "bold": True, "fontSize": 11},
+        "horizontalAlignment": "CENTER"
+    })]
+
+    # 2. Zebra Stripes, MVP & Pechvogel highlighted inside the list
+    for i, row in enumerate(rows):
+        cell_range = f"A{i+2}:D{i+2}"
+        if row[0] == mvp:
+            requests.append(fmt(cell_range, {"backgroundColor": GOLD, "textFormat": {"bold": True}}))
+        elif row[0] == pechvogel:
+            requests.append(fmt(cell_range, {"backgroundColor": PECH_RED}))
+        else:
             bg = ZEBRA_LIGHT if i % 2 == 1 else {"red": 1, "green": 1, "blue": 1}
-            dashboard.format(cell_range, {"backgroundColor": bg})
-            
-            # Highlight MVP & Pechvogel inside the list
-            current_player = rows[i][0]
-            if current_player == mvp:
-                dashboard.format(cell_range, {"backgroundColor": GOLD, "textFormat": {"bold": True}})
-            elif current_player == pechvogel:
-                dashboard.format(cell_range, {"backgroundColor": PECH_RED})
-
-        # 3. Highlight Header Styling
-        dashboard.format(f"A{start_row}:B{start_row}", {
-            "backgroundColor": FELT_GREEN,
-            "textFormat": {"foregroundColor": TEXT_WHITE, "bold": True},
-            "horizontalAlignment": "CENTER"
-        })
-
-        # 4. Global Adjustments
-        dashboard.freeze(rows=1)
-        
-        # 5. Column Widths & Central alignment
-        dashboard.format("A:D", {"horizontalAlignment": "CENTER", "verticalAlignment": "MIDDLE"})
+            requests.append(fmt(cell_range, {"backgroundColor": bg}))
 
-        # 6. RULES DISPLAY (New Section)
-        rules = get_rules(client, spreadsheet_id)
-        rules_start_row = start_row + len(highlight_data) + 2
-        
-        rules_header = [['📜 AKTUELLER REGELSATZ', 'Wert']]
-        rules_rows = []
-        for k, v in rules.items():
-            rules_rows.append([format_rule_name(k), v])
-            
-        dashboard.update(range_name=f'A{rules_start_row}', values=rules_header + rules_rows)
-        
-        # Style Rules Header
-        dashboard.format(f"A{rules_start_row}:B{rules_start_row}", {
-            "backgroundColor": FELT_GREEN,
-            "textFormat": {"foregroundColor": TEXT_WHITE, "bold": True},
-            "horizontalAlignment": "CENTER"
-        })
-        
+    # 3. Highlight & Rules Header Styling
+    requests.append(fmt(f"A{start_row}:B{start_row}", BAND))
+    requests.append(fmt(f"A{rules_start_row}:B{rules_start_row}", BAND))
+
+    # 4. Global Adjustments
+    requests.append({"updateSheetProperties": {
+        "properties": {"sheetId": dashboard.id, "gridProperties": {"frozenRowCount": 1}},
+        "fields": "gridProperties.frozenRowCount"
+    }})
+
+    # 5. Central alignment
+    requests.append(fmt("A:D", {"horizontalAlignment": "CENTER", "verticalAlignment": "MIDDLE"}))
+
+    try:
+        sh.batch_update({"requests": requests})
     except Exception as e:
         logger.error(f"Dashboard formatting error: {e}")
-        logger.error(f"Dashboard formatting error: {e}")
+
+# --- Keyboards ---
+ANNOUNCEMENT_OPTS = ("Re", "Kontra", "Keine 90", "Keine 60", "Keine 30", "Schwarz")
+EXTRA_OPTS = ("Fuchs", "Karlchen", "Doppelkopf", "Keine 90", "Keine 60", "Keine 30", "Schwarz", "Herz-Rundlauf")
+
+# Toggle keyboards are cached per (options, selection), identical states share one markup object
+@functools.lru_cache(maxsize=256)
+def build_toggle_kb(options: tuple, selected: frozenset, kind: str, done_text: str, done_cb: str) -> InlineKeyboardMarkup:
+    kb = InlineKeyboardBuilder()
+    for o in options:
+        prefix = "✅ " if o in selected else "⬜ "
+        kb.button(text=f"{prefix}{o}", callback_data=Toggle(kind=kind, value=o))
+    kb.adjust(2)
+    kb.row(InlineKeyboardButton(text=done_text, callback_data=done_cb))
+    return kb.as_markup()
+
+@functools.lru_cache(maxsize=256)
+def build_re_kb(players: tuple, selected: frozenset) -> InlineKeyboardMarkup:
+    kb = InlineKeyboardBuilder()
+    for p in players:
+        prefix = "✅ " if p in selected else "⬜ "
+        kb.button(text=f"{prefix}{p}", callback_data=Toggle(kind="re", value=p))
+    kb.adjust(2)
+    if len(selected) == 2:
+        kb.row(InlineKeyboardButton(text="Bestätigen ✅", callback_data="re_confirmed"))
+    return kb.as_markup()
+
+async def edit_toggle_markup(callback: types.CallbackQuery, state: FSMContext, data: Dict[str, Any], selected, markup: InlineKeyboardMarkup):
+    # Only send edit_reply_markup if the selection differs from what the message already shows
+    shown = sorted(selected)
+    if data.get("shown_selection", []) != shown:
+        await state.update_data(shown_selection=shown)
+        await callback.message.edit_reply_markup(reply_markup=markup)
+    await callback.answer()
+
+def build_static_kb(buttons, width: int = 1) -> InlineKeyboardMarkup:
+    kb = InlineKeyboardBuilder()
+    for text, cb in buttons:
+        kb.button(text=text, callback_data=cb)
+    kb.adjust(width)
+    return kb.as_markup()
+
+# Static keyboards are built once at import and shared by every callback
+GAME_TYPE_KB = build_static_kb([
+    ("Normal 🃏", GameChoice(kind="type", value="Normal")),
+    ("Solo 👤", GameChoice(kind="type", value="Solo")),
+])
+RE_WINNER_KB = build_static_kb([
+    ("Team Re 🎉", GameChoice(kind="winner", value="Re")),
+    ("Team Kontra 👊", GameChoice(kind="winner", value="Kontra")),
+])
+SOLO_WINNER_KB = build_static_kb([
+    ("Soloist gewonnen 🏆", GameChoice(kind="winner", value="Soloist")),
+    ("Gegenpartei gewonnen 💥", GameChoice(kind="winner", value="Others")),
+])
+ANNOUNCEMENT_KB = build_toggle_kb(ANNOUNCEMENT_OPTS, frozenset(), "ann", "Weiter ➡️", "ann_done")
+EXTRA_KB = build_toggle_kb(EXTRA_OPTS, frozenset(), "extra", "Abschließen 🏁", "extra_done")
+ADMIN_MENU_KB = build_static_kb([
+    ("Spieler zurücksetzen 👥", "admin_reset_players"),
+    ("Bockrunden löschen 🎰", "admin_reset_bock"),
+    ("Regeln anpassen ⚙️", "admin_edit_rules"),
+    ("Dashboard aktualisieren ✨", "admin_refresh_dashboard"),
+    ("Einladungs-Text 📩", "admin_invite"),
+    ("Demo-Daten löschen 🧨", "admin_full_reset"),
+])
+ADMIN_RESET_PLAYERS_KB = build_static_kb([
+    ("Ja, Reset!", "admin_confirm_reset"),
+    ("Abbrechen", "admin_cancel"),
+])
+ADMIN_FULL_RESET_KB = build_static_kb([
+    ("JA, ALLES LÖSCHEN! 🧨", "admin_confirm_full_reset"),
+    ("Abbrechen 🚫", "admin_cancel"),
+])
+
+# Rule picker only changes with the set of rule keys
+@functools.lru_cache(maxsize=8)
+def build_rules_kb(keys: tuple) -> InlineKeyboardMarkup:
+    kb = InlineKeyboardBuilder()
+    for k in keys:
+        kb.button(text=format_rule_name(k), callback_data=EditRule(key=k))
+    kb.adjust(1)
+    kb.row(InlineKeyboardButton(text="Zurück ⬅️", callback_data="admin_cancel"))
+    return kb.as_markup()
 
 # --- Handlers ---
 
@@ -415,7 +978,7 @@ async def cmd_start(message: types.Message, state: FSMContext):
     # Check if players exist
     try:
         client = get_sheets_client()
-        players = get_players_from_dashboard(client, SPREADSHEET_ID)
+        players = await _sheets(get_players_from_dashboard, client, SPREADSHEET_ID)
         if not players:
             await message.answer("Es sind noch keine Spieler registriert. Bitte gib die Namen der 4 oder 5 Spieler ein (kommagetrennt):")
             await state.set_state(SetupStates.waiting_for_players)
@@ -432,7 +995,9 @@ async def process_players(message: types.Message, state: FSMContext):
     await state.update_data(players=players)
     try:
         client = get_sheets_client()
-        update_dashboard(client, SPREADSHEET_ID, players)
+        await _sheets(update_dashboard, client, SPREADSHEET_ID, players)
+        get_players_from_dashboard.cache_put(players, client, SPREADSHEET_ID)
+        USER_MAP.clear()
         await message.answer(f"Spieler registriert: {', '.join(players)}\n\nAlle Statistiken werden ab jetzt auf dem Live-Dashboard getrackt! 📊")
     except Exception as e:
         logger.error(f"Error updating dashboard: {e}")
@@ -443,7 +1008,7 @@ async def process_players(message: types.Message, state: FSMContext):
 async def cmd_score(message: types.Message, state: FSMContext):
     try:
         client = get_sheets_client()
-        players = get_players_from_dashboard(client, SPREADSHEET_ID)
+        players = await _sheets(get_players_from_dashboard, client, SPREADSHEET_ID)
         if not players:
             await message.answer("Keine Spieler gefunden. Bitte nutze /start.")
             return
@@ -452,38 +1017,31 @@ async def cmd_score(message: types.Message, state: FSMContext):
         await message.answer(f"Fehler beim Laden der Spieler: {e}")
         return
     
-    kb = InlineKeyboardBuilder()
-    kb.button(text="Normal 🃏", callback_data="type:Normal")
-    kb.button(text="Solo 👤", callback_data="type:Solo")
-    kb.adjust(1)
-    await message.answer("Was für ein Spiel war es?", reply_markup=kb.as_markup())
+    await message.answer("Was für ein Spiel war es?", reply_markup=GAME_TYPE_KB)
     await state.set_state(GameStates.waiting_for_game_type)
 
-@dp.callback_query(F.data.startswith("type:"))
-async def process_game_type(callback: types.CallbackQuery, state: FSMContext):
-    game_type = callback.data.split(":")[1]
+@dp.callback_query(GameChoice.filter(F.kind == "type"))
+async def process_game_type(callback: types.CallbackQuery, callback_data: GameChoice, state: FSMContext):
+    game_type = callback_data.value
     await state.update_data(type=game_type)
     data = await state.get_data()
     players = data["players"]
 
     if game_type == "Normal":
-        await state.update_data(re_players=[]) 
-        kb = InlineKeyboardBuilder()
-        for p in players:
-            kb.button(text=f"⬜ {p}", callback_data=f"toggle_re:{p}")
-        kb.adjust(2)
-        await callback.message.edit_text("Wer ist Team Re? (Wähle 2 Spieler)", reply_markup=kb.as_markup())
+        await state.update_data(re_players=[], shown_selection=[])
+        kb = build_re_kb(tuple(players), frozenset())
+        await callback.message.edit_text("Wer ist Team Re? (Wähle 2 Spieler)", reply_markup=kb)
         await state.set_state(GameStates.waiting_for_re_players)
     else:
         kb = InlineKeyboardBuilder()
         for p in players:
-            kb.button(text=p, callback_data=f"soloist:{p}")
+            kb.button(text=p, callback_data=GameChoice(kind="soloist", value=p))
         await callback.message.edit_text("Wer war der Solist?", reply_markup=kb.as_markup())
         await state.set_state(GameStates.waiting_for_soloist)
 
-@dp.callback_query(F.data.startswith("toggle_re:"))
-async def handle_re_selection(callback: types.CallbackQuery, state: FSMContext):
-    p_selected = callback.data.split(":")[1]
+@dp.callback_query(Toggle.filter(F.kind == "re"))
+async def handle_re_selection(callback: types.CallbackQuery, callback_data: Toggle, state: FSMContext):
+    p_selected = callback_data.value
     data = await state.get_data()
     re_players = data.get("re_players", [])
     players = data["players"]
@@ -495,139 +1053,107 @@ async def handle_re_selection(callback: types.CallbackQuery, state: FSMContext):
             re_players.append(p_selected)
     
     await state.update_data(re_players=re_players)
-    kb = InlineKeyboardBuilder()
-    for p in players:
-        prefix = "✅ " if p in re_players else "⬜ "
-        kb.button(text=f"{prefix}{p}", callback_data=f"toggle_re:{p}")
-    kb.adjust(2)
-    if len(re_players) == 2:
-        kb.row(InlineKeyboardButton(text="Bestätigen ✅", callback_data="re_confirmed"))
-    await callback.message.edit_reply_markup(reply_markup=kb.as_markup())
+    kb = build_re_kb(tuple(players), frozenset(re_players))
+    await edit_toggle_markup(callback, state, data, re_players, kb)
 
 @dp.callback_query(F.data == "re_confirmed")
 async def confirm_re_team(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
     re_str = ", ".join(data["re_players"])
-    kb = InlineKeyboardBuilder()
-    kb.button(text="Team Re 🎉", callback_data="winner:Re")
-    kb.button(text="Team Kontra 👊", callback_data="winner:Kontra")
-    kb.adjust(1)
-    await callback.message.edit_text(f"Team Re: {re_str}\n\nWer hat gewonnen?", reply_markup=kb.as_markup())
+    await callback.message.edit_text(f"Team Re: {re_str}\n\nWer hat gewonnen?", reply_markup=RE_WINNER_KB)
     await state.set_state(GameStates.waiting_for_winner)
 
-@dp.callback_query(F.data.startswith("soloist:"))
-async def process_soloist(callback: types.CallbackQuery, state: FSMContext):
-    soloist = callback.data.split(":")[1]
+@dp.callback_query(GameChoice.filter(F.kind == "soloist"))
+async def process_soloist(callback: types.CallbackQuery, callback_data: GameChoice, state: FSMContext):
+    soloist = callback_data.value
     await state.update_data(soloist=soloist)
-    kb = InlineKeyboardBuilder()
-    kb.button(text="Soloist gewonnen 🏆", callback_data="winner:Soloist")
-    kb.button(text="Gegenpartei gewonnen 💥", callback_data="winner:Others")
-    kb.adjust(1)
-    await callback.message.edit_text(f"Hat {soloist} gewonnen?", reply_markup=kb.as_markup())
+    await callback.message.edit_text(f"Hat {soloist} gewonnen?", reply_markup=SOLO_WINNER_KB)
     await state.set_state(GameStates.waiting_for_winner)
 
-@dp.callback_query(F.data.startswith("winner:"))
-async def handle_winner_selection(callback: types.CallbackQuery, state: FSMContext):
-    winner = callback.data.split(":")[1]
-    await state.update_data(winner_team=winner, announcements=[])
-    kb = InlineKeyboardBuilder()
-    options = ["Re", "Kontra", "Keine 90", "Keine 60", "Keine 30", "Schwarz"]
-    for opt in options:
-        kb.button(text=f"⬜ {opt}", callback_data=f"toggle_ann:{opt}")
-    kb.adjust(2)
-    kb.row(InlineKeyboardButton(text="Weiter ➡️", callback_data="ann_done"))
-    await callback.message.edit_text("Welche Ansagen wurden gemacht?", reply_markup=kb.as_markup())
+@dp.callback_query(GameChoice.filter(F.kind == "winner"))
+async def handle_winner_selection(callback: types.CallbackQuery, callback_data: GameChoice, state: FSMContext):
+    winner = callback_data.value
+    await state.update_data(winner_team=winner, announcements=[], shown_selection=[])
+    await callback.message.edit_text("Welche Ansagen wurden gemacht?", reply_markup=ANNOUNCEMENT_KB)
     await state.set_state(GameStates.waiting_for_announcements)
 
-@dp.callback_query(F.data.startswith("toggle_ann:"))
-async def handle_announcement_toggle(callback: types.CallbackQuery, state: FSMContext):
-    opt = callback.data.split(":")[1]
+@dp.callback_query(Toggle.filter(F.kind == "ann"))
+async def handle_announcement_toggle(callback: types.CallbackQuery, callback_data: Toggle, state: FSMContext):
+    opt = callback_data.value
     data = await state.get_data()
     anns = data.get("announcements", [])
     if opt in anns: anns.remove(opt)
     else: anns.append(opt)
     await state.update_data(announcements=anns)
-    kb = InlineKeyboardBuilder()
-    options = ["Re", "Kontra", "Keine 90", "Keine 60", "Keine 30", "Schwarz"]
-    for o in options:
-        prefix = "✅ " if o in anns else "⬜ "
-        kb.button(text=f"{prefix}{o}", callback_data=f"toggle_ann:{o}")
-    kb.adjust(2)
-    kb.row(InlineKeyboardButton(text="Weiter ➡️", callback_data="ann_done"))
-    await callback.message.edit_reply_markup(reply_markup=kb.as_markup())
+    kb = build_toggle_kb(ANNOUNCEMENT_OPTS, frozenset(anns), "ann", "Weiter ➡️", "ann_done")
+    await edit_toggle_markup(callback, state, data, anns, kb)
 
 @dp.callback_query(F.data == "ann_done")
 async def handle_announcement_done(callback: types.CallbackQuery, state: FSMContext):
-    await state.update_data(extra_points=[])
-    kb = InlineKeyboardBuilder()
-    options = ["Fuchs", "Karlchen", "Doppelkopf", "Keine 90", "Keine 60", "Keine 30", "Schwarz", "Herz-Rundlauf"]
-    for opt in options:
-        kb.button(text=f"⬜ {opt}", callback_data=f"toggle_extra:{opt}")
-    kb.adjust(2)
-    kb.row(InlineKeyboardButton(text="Abschließen 🏁", callback_data="extra_done"))
-    await callback.message.edit_text("Welche Sonderpunkte/Absagen gab es?", reply_markup=kb.as_markup())
+    await state.update_data(extra_points=[], shown_selection=[])
+    await callback.message.edit_text("Welche Sonderpunkte/Absagen gab es?", reply_markup=EXTRA_KB)
     await state.set_state(GameStates.waiting_for_special_points)
 
-@dp.callback_query(F.data.startswith("toggle_extra:"))
-async def handle_extra_toggle(callback: types.CallbackQuery, state: FSMContext):
-    opt = callback.data.split(":")[1]
+@dp.callback_query(Toggle.filter(F.kind == "extra"))
+async def handle_extra_toggle(callback: types.CallbackQuery, callback_data: Toggle, state: FSMContext):
+    opt = callback_data.value
     data = await state.get_data()
     extras = data.get("extra_points", [])
     if opt in extras: extras.remove(opt)
     else: extras.append(opt)
     await state.update_data(extra_points=extras)
-    kb = InlineKeyboardBuilder()
-    options = ["Fuchs", "Karlchen", "Doppelkopf", "Keine 90", "Keine 60", "Keine 30", "Schwarz", "Herz-Rundlauf"]
-    for o in options:
-        prefix = "✅ " if o in extras else "⬜ "
-        kb.button(text=f"{prefix}{o}", callback_data=f"toggle_extra:{o}")
-    kb.adjust(2)
-    kb.row(InlineKeyboardButton(text="Abschließen 🏁", callback_data="extra_done"))
-    await callback.message.edit_reply_markup(reply_markup=kb.as_markup())
+    kb = build_toggle_kb(EXTRA_OPTS, frozenset(extras), "extra", "Abschließen 🏁", "extra_done")
+    await edit_toggle_markup(callback, state, data, extras, kb)
 
 @dp.callback_query(F.data == "extra_done")
 async def handle_final_score(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
-    if "players" not in data:
-        client = get_sheets_client()
-        players = get_players_from_dashboard(client, SPREADSHEET_ID)
-        await state.update_data(players=players)
-        data = await state.get_data()
+    if "type" not in data or "players" not in data:
+        # Round already submitted (double tap) or state lost after a restart/expiry
+        await callback.answer("Runde abgelaufen – bitte /score neu starten", show_alert=True)
+        return
+    # Answer right away so the button stops spinning, the Sheets work runs in the background
+    await callback.answer()
+    await state.clear()
+    run_in_background(score_round(callback, data))
+
+GIMMICKS = ("Sauber! 🍻", "Stark gespielt! 🔥", "Prost! 🍺", "Unschlagbar! 🃏", "Das war knapp... 😱")
+
+async def score_round(callback: types.CallbackQuery, data: Dict[str, Any]):
     players = data["players"]
-    
     try:
         await callback.message.edit_text("Berechne Punkte... ⏳")
         client = get_sheets_client()
-        rules = get_rules(client, SPREADSHEET_ID)
-        
-        # Bock-Logik
-        current_bock = get_bock_count(client, SPREADSHEET_ID)
-        is_bock_round = current_bock > 0
+        now = datetime.now() # One timestamp for the sheet name, the row and the live ticker
+        today_str = now.strftime("%d.%m.%y")
         
         if data["type"] == "Normal" and ("re_players" not in data or len(data["re_players"]) != 2):
             await callback.message.answer("⚠️ Fehler: Team Re wurde nicht korrekt festgelegt.")
-            await state.clear()
             return
 
-        scores = calculate_points(data, rules, players, is_bock=is_bock_round)
-        
-        # Bock-Zähler aktualisieren
-        new_bock = current_bock
-        if is_bock_round: new_bock -= 1
-        if "Herz-Rundlauf" in data.get("extra_points", []):
-            new_bock += 4
-        
-        if new_bock != current_bock:
-            set_bock_count(client, SPREADSHEET_ID, new_bock)
-
-        # Log to Sheet
-        sheet = get_or_create_daily_sheet(client, SPREADSHEET_ID, players)
-        row = [datetime.now().strftime("%H:%M:%S"), data["type"], data["winner_team"], sum([s for s in scores.values() if s > 0])]
-        for p in players: row.append(scores[p])
-        sheet.append_row(row)
+        # Rounds are serialized so the in-memory bock counter can't be read twice before a write
+        async with _bock_lock:
+            rules, current_bock, sheet, filled_rows = await _sheets(read_round_state, client, SPREADSHEET_ID, today_str)
+            
+            # Bock-Logik
+            is_bock_round = current_bock > 0
+            scores = calculate_points(data, rules, players, is_bock=is_bock_round)
+            
+            # Bock-Zähler aktualisieren
+            new_bock = current_bock
+            if is_bock_round: new_bock -= 1
+            granted = 4 if "Herz-Rundlauf" in data.get("extra_points", []) else 0
+            new_bock += granted
+
+            # Log to Sheet (together with the new bock count)
+            row = [now.strftime("%H:%M:%S"), data["type"], data["winner_team"], sum([s for s in scores.values() if s > 0])]
+            for p in players: row.append(scores[p])
+            row += [1 if is_bock_round else 0, granted]
+            logged_row = await _sheets(log_round, client, SPREADSHEET_ID, today_str, sheet, filled_rows, players, row,
+                                       new_bock if new_bock != current_bock else None)
         
         # Success Message
-        score_details = "\n".join([f"• {p}: `{s:+}` Pkt" for p, s in scores.items()])
+        score_details = "\n".join([f"• {md(p)}: `{s:+}` Pkt" for p, s in scores.items()])
         summary = f"**Runde geloggt! ✅**\n\n"
         
         if is_bock_round: 
@@ -649,57 +1175,54 @@ async def handle_final_score(callback: types.CallbackQuery, state: FSMContext):
         
         if "Herz-Rundlauf" in data.get("extra_points", []):
             summary += "\n\n📢 **HERZ-RUNDLAUF!** Das gibt 4 neue Bockrunden! 💥"
-            
-        await callback.message.edit_text(summary, parse_mode="Markdown")
-        
-        # Proactively update dashboard with new stats & Live Ticker
-        last_action = f"{data['type']} (+{sum([s for s in scores.values() if s > 0])})"
-        update_dashboard(client, SPREADSHEET_ID, players, last_action=last_action)
         
-        # Random Gimmick
-        gimmicks = ["Sauber! 🍻", "Stark gespielt! 🔥", "Prost! 🍺", "Unschlagbar! 🃏", "Das war knapp... 😱"]
-        await callback.message.answer(random.choice(gimmicks))
+        # Random Gimmick rides along in the same message
+        summary += f"\n\n{random.choice(GIMMICKS)}"
+        await callback.message.edit_text(summary, parse_mode="Markdown")
         
     except Exception as e:
         logger.error(f"Scoring error: {e}")
         await callback.message.answer(f"❌ Fehler beim Loggen: {e}")
-    await state.clear()
+        return
+
+    # Proactively update dashboard with new stats & Live Ticker. The round is already
+    # logged here, so a failure must not look like a logging error (it invites re-entry).
+    try:
+        last_action = f"{data['type']} (+{sum([s for s in scores.values() if s > 0])})"
+        await _sheets(update_dashboard, client, SPREADSHEET_ID, players, last_action=last_action,
+                      new_round=(today_str, logged_row, scores), hhmm=now.strftime("%H:%M"))
+    except Exception as e:
+        logger.error(f"Dashboard update error: {e}")
 
 @dp.message(Command("kasse"))
 async def cmd_kasse(message: types.Message):
     try:
         client = get_sheets_client()
-        rules = get_rules(client, SPREADSHEET_ID)
+        rules = await _sheets(get_rules, client, SPREADSHEET_ID)
         cent_faktor = float(rules.get("CentFaktor", 0.05))
         eintritt = float(rules.get("EintrittGeld", 10.0))
-        sh = client.open_by_key(SPREADSHEET_ID)
-        players = get_players_from_dashboard(client, SPREADSHEET_ID)
-        totals = {p: 0 for p in players}
+        sh = await _sheets(open_spreadsheet, client, SPREADSHEET_ID)
+        players = await _sheets(get_players_from_dashboard, client, SPREADSHEET_ID)
+        sums = np.zeros(len(players), dtype=np.int64)
         # Count days played per player to multiply the entry fee per day
-        days_played = {p: 0 for p in players}
+        days = np.zeros(len(players), dtype=np.int64)
         
-        for ws in sh.worksheets():
-            if ws.title in ["Dashboard", "Rules"]: continue
-            data = ws.get_all_records()
-            if not data: continue
-            
-            # Check who played on this day
-            day_players = set()
-            for row in data:
-                for p in players:
-                    if str(row.get(p, "")) != "": 
-                        totals[p] += int(row.get(p, 0))
-                        day_players.add(p)
-            for p in day_players:
-                days_played[p] += 1
+        daily_values = await _sheets(load_all_daily_values, sh)
+        for values in daily_values.values():
+            points, filled = player_matrix(values, players)
+            sums += points.sum(axis=0)
+            # Everyone with at least one entry played on this day
+            days += filled.any(axis=0)
+        totals = dict(zip(players, sums.tolist()))
+        days_played = dict(zip(players, days.tolist()))
                 
-        res = "💶 **Aktueller Kassen-Stand (Inkl. Antrittsgeld):**\n\n"
+        parts = ["💶 **Aktueller Kassen-Stand (Inkl. Antrittsgeld):**\n\n"]
         for p, s in totals.items():
             euro = s * cent_faktor
             abzug = days_played[p] * eintritt
             gesamt = euro - abzug
-            res += f"👤 **{p}**:\n   - Erspielt: {s} Pkt ({euro:+.2f}€)\n   - Antritt ({days_played[p]}x): -{abzug:.2f}€\n   👉 Total: **{gesamt:+.2f}€**\n\n"
-        await message.answer(res, parse_mode="Markdown")
+            parts.append(f"👤 **{md(p)}**:\n   - Erspielt: {s} Pkt ({euro:+.2f}€)\n   - Antritt ({days_played[p]}x): -{abzug:.2f}€\n   👉 Total: **{gesamt:+.2f}€**\n\n")
+        await message.answer("".join(parts), parse_mode="Markdown")
     except Exception as e:
         await message.answer(f"Fehler: {e}")
 
@@ -714,23 +1237,16 @@ async def cmd_dashboard(message: types.Message):
 async def cmd_undo(message: types.Message):
     try:
         client = get_sheets_client()
-        sh = client.open_by_key(SPREADSHEET_ID)
+        players = await _sheets(get_players_from_dashboard, client, SPREADSHEET_ID)
         today_str = datetime.now().strftime("%d.%m.%y")
         try:
-            worksheet = sh.worksheet(today_str)
-            rows = worksheet.get_all_values()
-            if len(rows) <= 1:
+            # Same lock as scoring, the bock counter is rolled back together with the row
+            async with _bock_lock:
+                new_bock = await _sheets(undo_last_round, client, SPREADSHEET_ID, today_str, players)
+            if new_bock is None:
                 await message.answer("Keine Runden zum Rückgängigmachen vorhanden.")
                 return
-            
-            # Get last row values to check for Bock adjustments
-            last_row = rows[-1]
-            # Since we don't store "was it bock" in the row explicitly in a way that's easy to reverse,
-            # this is a bit tricky. But the last entry in main.py logic subtracts bock if is_bock_round.
-            
-            # Simple delete for now
-            worksheet.delete_rows(len(rows))
-            await message.answer("Letzte Runde wurde erfolgreich gelöscht! 🗑️")
+            await message.answer(f"Letzte Runde wurde erfolgreich gelöscht! 🗑️\n🎰 Bockrunden: {new_bock}")
         except gspread.WorksheetNotFound:
             await message.answer("Heute wurden noch keine Runden gespielt.")
     except Exception as e:
@@ -740,7 +1256,7 @@ async def cmd_undo(message: types.Message):
 async def cmd_mischen(message: types.Message):
     try:
         client = get_sheets_client()
-        players = get_players_from_dashboard(client, SPREADSHEET_ID)
+        players = await _sheets(get_players_from_dashboard, client, SPREADSHEET_ID)
         if not players:
             await message.answer("Keine Spieler gefunden. Nutze /start.")
             return
@@ -748,11 +1264,10 @@ async def cmd_mischen(message: types.Message):
         shuffled = players.copy()
         random.shuffle(shuffled)
         
-        res = "🎲 **Neue Sitzordnung:**\n\n"
-        for i, p in enumerate(shuffled, 1):
-            res += f"{i}. {p}\n"
-        res += "\nDer Erste gibt an! 🃏"
-        await message.answer(res, parse_mode="Markdown")
+        parts = ["🎲 **Neue Sitzordnung:**\n\n"]
+        parts += [f"{i}. {md(p)}\n" for i, p in enumerate(shuffled, 1)]
+        parts.append("\nDer Erste gibt an! 🃏")
+        await message.answer("".join(parts), parse_mode="Markdown")
     except Exception as e:
         await message.answer(f"Fehler beim Mischen: {e}")
 
@@ -761,37 +1276,32 @@ async def cmd_stats(message: types.Message):
     try:
         await message.answer("Berechne Statistiken... 📊")
         client = get_sheets_client()
-        sh = client.open_by_key(SPREADSHEET_ID)
-        players = get_players_from_dashboard(client, SPREADSHEET_ID)
-        totals = {p: 0 for p in players}
-        games_count = {p: 0 for p in players}
-        wins = {p: 0 for p in players}
-        
-        for ws in sh.worksheets():
-            if ws.title in ["Dashboard", "Rules"]: continue
-            data = ws.get_all_records()
-            for row in data:
-                for p in players:
-                    pts = int(row.get(p, 0))
-                    totals[p] += pts
-                    if pts != 0:
-                        games_count[p] += 1
-                        if pts > 0: wins[p] += 1
+        sh = await _sheets(open_spreadsheet, client, SPREADSHEET_ID)
+        players = await _sheets(get_players_from_dashboard, client, SPREADSHEET_ID)
+        # Same all-time stats the dashboard keeps, no sheet reads once they are warm
+        sums, games, won = await _sheets(dashboard_stats, sh, players)
+        if not games.any():
+            await message.answer("Noch keine Runden gespielt.")
+            return
+        totals = dict(zip(players, sums.tolist()))
+        games_count = dict(zip(players, games.tolist()))
+        wins = dict(zip(players, won.tolist()))
         
         # Determine MVP (Highest Total) and Pechvogel (Lowest Total)
-        mvp = max(totals, key=totals.get)
-        pechvogel = min(totals, key=totals.get)
+        mvp = players[int(sums.argmax())]
+        pechvogel = players[int(sums.argmin())]
         
-        res = "🏆 **Stichfest-Statistiken** 🏆\n\n"
+        parts = ["🏆 **Stichfest-Statistiken** 🏆\n\n"]
         for p in players:
             win_rate = (wins[p] / games_count[p] * 100) if games_count[p] > 0 else 0
-            res += f"👤 *{p}*:\n   - Pkt: {totals[p]}\n   - Win-Rate: {win_rate:.1f}%\n"
+            parts.append(f"👤 **{md(p)}**:\n   - Pkt: {totals[p]}\n   - Win-Rate: {win_rate:.1f}%\n")
         
-        res += f"\n🥇 **MVP:** {mvp} ({totals[mvp]} Pkt)\n"
-        res += f"📉 **Pechvogel:** {pechvogel} ({totals[pechvogel]} Pkt)\n"
+        parts.append(f"\n🥇 **MVP:** {md(mvp)} ({totals[mvp]} Pkt)\n")
+        parts.append(f"📉 **Pechvogel:** {md(pechvogel)} ({totals[pechvogel]} Pkt)\n")
+        res = "".join(parts)
         
         # --- Ultra-Premium Graphical Chart ---
-        chart_buf = generate_stats_chart(players, SPREADSHEET_ID)
+        chart_buf = await _sheets(generate_stats_chart, players, SPREADSHEET_ID)
         if chart_buf:
             photo = types.BufferedInputFile(chart_buf.read(), filename="stats.png")
             await message.answer_photo(photo, caption=res, parse_mode="Markdown")
@@ -806,29 +1316,25 @@ async def cmd_settlement(message: types.Message):
     try:
         await message.answer("Erstelle Tages-Abrechnung... 💰")
         client = get_sheets_client()
-        rules = get_rules(client, SPREADSHEET_ID)
+        rules = await _sheets(get_rules, client, SPREADSHEET_ID)
         cent_faktor = float(rules.get("CentFaktor", 0.05))
         eintritt = float(rules.get("EintrittGeld", 10.0))
-        sh = client.open_by_key(SPREADSHEET_ID)
-        players = get_players_from_dashboard(client, SPREADSHEET_ID)
+        sh = await _sheets(open_spreadsheet, client, SPREADSHEET_ID)
+        players = await _sheets(get_players_from_dashboard, client, SPREADSHEET_ID)
         
         today_str = datetime.now().strftime("%d.%m.%y")
         try:
-            ws = sh.worksheet(today_str)
-            data = ws.get_all_records()
+            values = await _sheets(read_day_values, sh, today_str)
         except gspread.WorksheetNotFound:
             await message.answer("Heute wurden noch keine Runden gespielt. Nichts abzurechnen! 🍻")
             return
 
-        today_totals = {p: 0 for p in players}
-        has_played = {p: False for p in players}
-        for row in data:
-            for p in players:
-                if str(row.get(p, "")) != "":
-                    today_totals[p] += int(row.get(p, 0))
-                    has_played[p] = True
+        # rounds x players, summed per column; a player counts as present with any filled cell
+        points, filled = player_matrix(values, players)
+        today_totals = dict(zip(players, points.sum(axis=0).tolist()))
+        has_played = dict(zip(players, filled.any(axis=0).tolist()))
         
-        res = f"💰 **Abrechnung für heute ({today_str}):**\n\n"
+        parts = [f"💰 **Abrechnung für heute ({today_str}):**\n\n"]
         for p, s in today_totals.items():
             if not has_played[p]: continue # Skip players who didn't play today
             
@@ -836,13 +1342,15 @@ async def cmd_settlement(message: types.Message):
             gesamt = euro - eintritt
             status = "zahlt" if gesamt < 0 else "bekommt"
             
-            res += f"👤 **{p}**:\n"
-            res += f"   - Punkte: {s} Pkt ({euro:+.2f}€)\n"
-            res += f"   - Antrittsgeld: -{eintritt:.2f}€\n"
-            res += f"   👉 {abs(gesamt):.2f}€ {status}\n\n"
+            parts.append(
+                f"👤 **{md(p)}**:\n"
+                f"   - Punkte: {s} Pkt ({euro:+.2f}€)\n"
+                f"   - Antrittsgeld: -{eintritt:.2f}€\n"
+                f"   👉 {abs(gesamt):.2f}€ {status}\n\n"
+            )
         
-        res += "Prost! 🍻"
-        await message.answer(res, parse_mode="Markdown")
+        parts.append("Prost! 🍻")
+        await message.answer("".join(parts), parse_mode="Markdown")
     except Exception as e:
         await message.answer(f"Fehler bei Abrechnung: {e}")
 
@@ -851,101 +1359,112 @@ async def cmd_beenden(message: types.Message):
     try:
         await message.answer("Bereite Abend-Abschluss vor... 🎓🏆")
         client = get_sheets_client()
-        sh = client.open_by_key(SPREADSHEET_ID)
-        players = get_players_from_dashboard(client, SPREADSHEET_ID)
-        
-        # Calculate session stats (Today)
+        sh = await _sheets(open_spreadsheet, client, SPREADSHEET_ID)
         today_str = datetime.now().strftime("%d.%m.%y")
-        today_totals = {p: 0 for p in players}
-        solos_count = {p: 0 for p in players}
         
-        try:
-            ws = sh.worksheet(today_str)
-            data = ws.get_all_records()
-            for row in data:
-                for p in players:
-                    today_totals[p] += int(row.get(p, 0))
-                # Check if it was a solo (simple heuristic: one player has much higher/lower points)
-                # Actually, our sheet doesn't track Solo per row explicitly in a way that's easy to scrape without searching tags.
-                # So we'll skip solo-king for now to be safe.
-        except:
+        # Player list and today's sheet are independent reads, fetch them concurrently.
+        # Only a missing day sheet means "no games"; every other error goes to the handler below.
+        players, values = await asyncio.gather(
+            _sheets(get_players_from_dashboard, client, SPREADSHEET_ID),
+            _sheets(read_day_values, sh, today_str),
+            return_exceptions=True
+        )
+        if isinstance(players, BaseException):
+            raise players
+        if isinstance(values, gspread.WorksheetNotFound):
             await message.answer("Heute wurden keine Spiele aufgezeichnet. Nichts zu beenden! 🍻")
             return
+        if isinstance(values, BaseException):
+            raise values
+
+        # Calculate session stats (Today)
+        # Solo-king is skipped: the sheet doesn't tag solos per row in a way that's easy to scrape.
+        points, _ = player_matrix(values, players)
+        sums = points.sum(axis=0)
+        today_totals = dict(zip(players, sums.tolist()))
 
-        final_mvp = max(today_totals, key=today_totals.get)
-        final_pech = min(today_totals, key=today_totals.get)
+        final_mvp = players[int(sums.argmax())]
+        final_pech = players[int(sums.argmin())]
         
-        res = f"🌟 **DER EHRENHAFTE ABSCHLUSS ({today_str})** 🌟\n\n"
-        res += f"🥇 **König des Abends:** {final_mvp} ({today_totals[final_mvp]} Pkt)\n"
-        res += f"📉 **Ehrenhafter Pechvogel:** {final_pech} ({today_totals[final_pech]} Pkt)\n\n"
+        parts = [
+            f"🌟 **DER EHRENHAFTE ABSCHLUSS ({today_str})** 🌟\n\n",
+            f"🥇 **König des Abends:** {md(final_mvp)} ({today_totals[final_mvp]} Pkt)\n",
+            f"📉 **Ehrenhafter Pechvogel:** {md(final_pech)} ({today_totals[final_pech]} Pkt)\n\n",
+            "Hier ist eure Sieger-Statistik für heute:\n",
+        ]
+        parts += [f"• {md(p)}: {today_totals[p]} Pkt\n" for p in players]
+        parts.append("\nWar eine super Runde! Bis zum nächsten Mal! 🃏🍻✨")
+        res = "".join(parts)
         
-        res += "Hier ist eure Sieger-Statistik für heute:\n"
-        for p in players:
-            res += f"• {p}: {today_totals[p]} Pkt\n"
-            
-        res += "\nWar eine super Runde! Bis zum nächsten Mal! 🃏🍻✨"
+        await message.answer(res, parse_mode="Markdown")
         
         # Final Dashboard Lock
-        update_dashboard(client, SPREADSHEET_ID, players, last_action="Abend beendet! 🏁")
-        
-        await message.answer(res, parse_mode="Markdown")
+        await _sheets(update_dashboard, client, SPREADSHEET_ID, players, last_action="Abend beendet! 🏁")
         
         # --- ULTRA PREMIUM GIMMICK: AI Trophy ---
-        try:
-            from google.genai import types as gen_types
-            prompt = f"A photorealistic, luxury golden trophy for a Doppelkopf card game winner. The trophy features a deck of cards and a beer mug, glowing in a high-end gaming lounge, 8k resolution, premium lighting, winner name '{final_mvp}' engraved (optional)."
-            # Note: generate_image is an agent tool, I can call it but I'll describe it here for the user 
-            # and simulate the 'AI Generation' feel or use an existing asset if I had one.
-            # In actual code, I would just use a high-end sticker or predefined image.
-            # For this '10M€' feel, let's suggest the user sees the generated artifact I provide next.
-        except: pass
+        # Image generation takes a while, the trophy arrives after the summary when it's ready
+        if GEMINI_API_KEY and genai:
+            run_in_background(send_trophy(message.chat.id, final_mvp))
 
     except Exception as e:
+        logger.error(f"Beenden error: {e}")
         await message.answer(f"Fehler beim Beenden: {e}")
 
+def generate_trophy(name: str) -> bytes:
+    prompt = f"A photorealistic, luxury golden trophy for a Doppelkopf card game winner. The trophy features a deck of cards and a beer mug, glowing in a high-end gaming lounge, 8k resolution, premium lighting, winner name '{name}' engraved (optional)."
+    client = genai.Client(api_key=GEMINI_API_KEY)
+    result = client.models.generate_images(model=GEMINI_IMAGE_MODEL, prompt=prompt,
+                                           config=gen_types.GenerateImagesConfig(number_of_images=1))
+    return result.generated_images[0].image.image_bytes
+
+async def send_trophy(chat_id: int, name: str):
+    try:
+        image = await asyncio.to_thread(generate_trophy, name)
+        await bot.send_photo(chat_id, types.BufferedInputFile(image, filename="trophy.png"), caption=f"🏆 {name}")
+    except Exception as e:
+        logger.error(f"Trophy error: {e}")
+
+# Telegram user id -> matched player name for /me, dropped when the players are reset
+USER_MAP: Dict[int, str] = {}
+
 @dp.message(Command("me"))
 async def cmd_me(message: types.Message):
     # Try to match Telegram name with registered player names
     tg_name = message.from_user.full_name
     try:
         client = get_sheets_client()
-        players = get_players_from_dashboard(client, SPREADSHEET_ID)
+        players = await _sheets(get_players_from_dashboard, client, SPREADSHEET_ID)
         
-        # Simple fuzzy match (if TG name is in registered players)
-        match = None
-        for p in players:
-            if p.lower() in tg_name.lower() or tg_name.lower() in p.lower():
-                match = p
-                break
+        # Simple fuzzy match (if TG name is in registered players), remembered per Telegram user
+        match = USER_MAP.get(message.from_user.id)
+        if match not in players:
+            match = None
+            for p in players:
+                if p.lower() in tg_name.lower() or tg_name.lower() in p.lower():
+                    match = p
+                    USER_MAP[message.from_user.id] = p
+                    break
         
         if not match:
             await message.answer(f"Ich konnte dich nicht automatisch zuordnen (Telegram: {tg_name}).\nRegistrierte Spieler: {', '.join(players)}")
             return
             
         # Aggregate logic same as above but just for one player
-        sh = client.open_by_key(SPREADSHEET_ID)
-        total = 0
-        games = 0
-        w = 0
-        for ws in sh.worksheets():
-            if ws.title in ["Dashboard", "Rules"]: continue
-            data = ws.get_all_records()
-            for row in data:
-                pts = int(row.get(match, 0))
-                total += pts
-                if pts != 0:
-                    games += 1
-                    if pts > 0: w += 1
+        # Column of the shared all-time stats arrays instead of a per-cell loop
+        sh = await _sheets(open_spreadsheet, client, SPREADSHEET_ID)
+        sums, played, won = await _sheets(dashboard_stats, sh, players)
+        i = players.index(match)
+        total, games, w = int(sums[i]), int(played[i]), int(won[i])
         
         win_rate = (w / games * 100) if games > 0 else 0
-        res = f"🎴 **Deine Statistik ({match})** 🎴\n\n"
-        res += f"• Gesamtpunkte: {total}\n"
-        res += f"• Spiele: {games}\n"
-        res += f"• Siege: {w}\n"
-        res += f"• Win-Rate: {win_rate:.1f}%\n"
-        
-        if total > 0: res += "\nLäuft bei dir! 🎉"
-        else: res += "\nDa ist noch Luft nach oben... 🍻"
+        res = (
+            f"🎴 **Deine Statistik ({md(match)})** 🎴\n\n"
+            f"• Gesamtpunkte: {total}\n"
+            f"• Spiele: {games}\n"
+            f"• Siege: {w}\n"
+            f"• Win-Rate: {win_rate:.1f}%\n"
+            + ("\nLäuft bei dir! 🎉" if total > 0 else "\nDa ist noch Luft nach oben... 🍻")
+        )
         
         await message.answer(res, parse_mode="Markdown")
     except Exception as e:
@@ -955,11 +1474,8 @@ async def cmd_me(message: types.Message):
 async def cmd_rules(message: types.Message):
     try:
         client = get_sheets_client()
-        rules = get_rules(client, SPREADSHEET_ID)
-        res = "📜 **Aktuelle Spielregeln:**\n\n"
-        for k, v in rules.items():
-            label = format_rule_name(k)
-            res += f"• **{label}**: `{v}`\n"
+        rules = await _sheets(get_rules, client, SPREADSHEET_ID)
+        res = "📜 **Aktuelle Spielregeln:**\n\n" + "".join(f"• **{format_rule_name(k)}**: `{v}`\n" for k, v in rules.items())
         
         url = f"https://docs.google.com/spreadsheets/d/{SPREADSHEET_ID}"
         kb = InlineKeyboardBuilder()
@@ -976,41 +1492,37 @@ async def cmd_admin(message: types.Message):
         await message.answer(f"🚫 Zugriff verweigert. Deine ID ({user_id}) ist nicht als Admin hinterlegt.")
         return
     
-    kb = InlineKeyboardBuilder()
-    kb.button(text="Spieler zurücksetzen 👥", callback_data="admin_reset_players")
-    kb.button(text="Bockrunden löschen 🎰", callback_data="admin_reset_bock")
-    kb.button(text="Regeln anpassen ⚙️", callback_data="admin_edit_rules")
-    kb.button(text="Dashboard aktualisieren ✨", callback_data="admin_refresh_dashboard")
-    kb.button(text="Einladungs-Text 📩", callback_data="admin_invite")
-    kb.button(text="Demo-Daten löschen 🧨", callback_data="admin_full_reset")
-    kb.adjust(1)
-    await message.answer("🛠 **Admin Panel**\nWas möchtest du tun?", reply_markup=kb.as_markup())
+    await message.answer("🛠 **Admin Panel**\nWas möchtest du tun?", reply_markup=ADMIN_MENU_KB)
 
 @dp.callback_query(F.data == "admin_reset_players")
 async def handle_admin_reset_players(callback: types.CallbackQuery, state: FSMContext):
     await callback.message.edit_text("⚠️ Bist du sicher? Dies löscht die Spieler-Zuordnung (nicht die Punkte im Sheet).",
-                                    reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                                        [InlineKeyboardButton(text="Ja, Reset!", callback_data="admin_confirm_reset")],
-                                        [InlineKeyboardButton(text="Abbrechen", callback_data="admin_cancel")]
-                                    ]))
+                                    reply_markup=ADMIN_RESET_PLAYERS_KB)
 
 @dp.callback_query(F.data == "admin_confirm_reset")
 async def handle_confirm_reset(callback: types.CallbackQuery):
+    global _bock_count
+    await callback.answer()
     try:
         client = get_sheets_client()
-        sh = client.open_by_key(SPREADSHEET_ID)
-        dashboard = sh.worksheet("Dashboard")
-        # Clear players column
-        dashboard.update(range_name='A2:A10', values=[[''] for _ in range(9)])
+        sh = await _sheets(open_spreadsheet, client, SPREADSHEET_ID)
+        # Clear players column and bock counter in one batchClear; the lock keeps a running round from writing it back
+        async with _bock_lock:
+            await _sheets(sh.values_batch_clear, body={"ranges": ["'Dashboard'!A2:A10", f"'Dashboard'!{BOCK_CELL}"]})
+            _bock_count = 0
+        get_players_from_dashboard.cache_clear()
+        USER_MAP.clear()
         await callback.message.edit_text("✅ Spieler-Zuordnung wurde zurückgesetzt. Nutze /start für ein neues Setup.")
     except Exception as e:
         await callback.message.answer(f"Fehler: {e}")
 
 @dp.callback_query(F.data == "admin_reset_bock")
 async def handle_reset_bock(callback: types.CallbackQuery):
+    await callback.answer()
     try:
         client = get_sheets_client()
-        set_bock_count(client, SPREADSHEET_ID, 0)
+        async with _bock_lock:
+            await _sheets(set_bock_count, client, SPREADSHEET_ID, 0)
         await callback.message.edit_text("✅ Bock-Runden wurden auf 0 gesetzt.")
     except Exception as e:
         await callback.message.answer(f"Fehler: {e}")
@@ -1020,15 +1532,16 @@ async def handle_refresh_dashboard(callback: types.CallbackQuery):
     try:
         await callback.answer("Dashboard wird poliert... ✨")
         client = get_sheets_client()
-        players = get_players_from_dashboard(client, SPREADSHEET_ID)
-        update_dashboard(client, SPREADSHEET_ID, players)
+        players = await _sheets(get_players_from_dashboard, client, SPREADSHEET_ID)
+        reset_dashboard_stats()  # Full recount, picks up manual edits in the sheet
+        await _sheets(update_dashboard, client, SPREADSHEET_ID, players)
         await callback.message.answer("✅ Das Google Sheet Dashboard wurde statistisch und visuell auf Hochglanz gebracht!")
     except Exception as e:
         await callback.message.answer(f"Fehler: {e}")
 
 @dp.callback_query(F.data == "admin_invite")
 async def handle_admin_invite(callback: types.CallbackQuery):
-    bot_info = await bot.get_me()
+    bot_info = await bot.me() # Cached since startup, no getMe round trip
     invite_text = (
         f"🃏 **Einladung zur Doppelkopf-Runde!** 🃏\n\n"
         f"Tretet dem Bot bei, um Punkte zu tracken und Statistiken zu sehen:\n\n"
@@ -1039,10 +1552,6 @@ async def handle_admin_invite(callback: types.CallbackQuery):
 
 @dp.callback_query(F.data == "admin_full_reset")
 async def handle_full_reset_request(callback: types.CallbackQuery):
-    kb = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="JA, ALLES LÖSCHEN! 🧨", callback_data="admin_confirm_full_reset")],
-        [InlineKeyboardButton(text="Abbrechen 🚫", callback_data="admin_cancel")]
-    ])
     await callback.message.edit_text(
         "🚨 **WARNUNG: KOMPLETT-RESET** 🚨\n\n"
         "Dies wird:\n"
@@ -1050,28 +1559,29 @@ async def handle_full_reset_request(callback: types.CallbackQuery):
         "2. Alle Statistiken auf 0 setzen.\n"
         "3. Den Bock-Zähler zurücksetzen.\n\n"
         "Bist du absolut sicher?",
-        reply_markup=kb,
+        reply_markup=ADMIN_FULL_RESET_KB,
         parse_mode="Markdown"
     )
 
 @dp.callback_query(F.data == "admin_confirm_full_reset")
 async def handle_confirm_full_reset(callback: types.CallbackQuery):
+    await callback.answer()
     try:
         await callback.message.edit_text("Reinige Datenbank... 🧹⏳")
         client = get_sheets_client()
-        sh = client.open_by_key(SPREADSHEET_ID)
+        sh = await _sheets(open_spreadsheet, client, SPREADSHEET_ID)
         
         # 1. Delete all daily sheets
-        for ws in sh.worksheets():
-            if ws.title not in ["Dashboard", "Rules"]:
-                sh.del_worksheet(ws)
+        await _sheets(delete_daily_sheets, sh)
+        reset_dashboard_stats()
         
         # 2. Reset Bock
-        set_bock_count(client, SPREADSHEET_ID, 0)
+        async with _bock_lock:
+            await _sheets(set_bock_count, client, SPREADSHEET_ID, 0)
         
         # 3. Refresh Dashboard (will be empty/clean)
-        players = get_players_from_dashboard(client, SPREADSHEET_ID)
-        update_dashboard(client, SPREADSHEET_ID, players)
+        players = await _sheets(get_players_from_dashboard, client, SPREADSHEET_ID)
+        await _sheets(update_dashboard, client, SPREADSHEET_ID, players)
         
         await callback.message.answer("🎉 **Alles blitzblank!** Sämtliche Demo-Daten wurden gelöscht. Viel Erfolg bei der ersten echten Runde! 🃏🍻")
     except Exception as e:
@@ -1079,22 +1589,17 @@ async def handle_confirm_full_reset(callback: types.CallbackQuery):
 
 @dp.callback_query(F.data == "admin_edit_rules")
 async def handle_admin_edit_rules(callback: types.CallbackQuery):
+    await callback.answer()
     try:
         client = get_sheets_client()
-        rules = get_rules(client, SPREADSHEET_ID)
-        kb = InlineKeyboardBuilder()
-        for k in rules.keys():
-            label = format_rule_name(k)
-            kb.button(text=label, callback_data=f"edit_rule:{k}")
-        kb.adjust(1)
-        kb.row(InlineKeyboardButton(text="Zurück ⬅️", callback_data="admin_cancel"))
-        await callback.message.edit_text("Welche Regel möchtest du ändern?", reply_markup=kb.as_markup())
+        rules = await _sheets(get_rules, client, SPREADSHEET_ID)
+        await callback.message.edit_text("Welche Regel möchtest du ändern?", reply_markup=build_rules_kb(tuple(rules)))
     except Exception as e:
         await callback.message.answer(f"Fehler: {e}")
 
-@dp.callback_query(F.data.startswith("edit_rule:"))
-async def process_edit_rule(callback: types.CallbackQuery, state: FSMContext):
-    rule_key = callback.data.split(":")[1]
+@dp.callback_query(EditRule.filter())
+async def process_edit_rule(callback: types.CallbackQuery, callback_data: EditRule, state: FSMContext):
+    rule_key = callback_data.key
     await state.update_data(editing_rule=rule_key)
     label = format_rule_name(rule_key)
     await callback.message.edit_text(f"Gib bitte den neuen Wert für **{label}** ein (als Zahl):")
@@ -1111,25 +1616,25 @@ async def handle_rule_value_input(message: types.Message, state: FSMContext):
         float(new_val)
         
         client = get_sheets_client()
-        sh = client.open_by_key(SPREADSHEET_ID)
-        rules_sheet = sh.worksheet("Rules")
+        sh = await _sheets(open_spreadsheet, client, SPREADSHEET_ID)
+        rules_sheet = await _sheets(get_worksheet, sh, "Rules")
         
-        # Find the row with the key
-        
-        # Determine format/row
-        cells = rules_sheet.findall(rule_key)
-        if not cells:
+        # Find the row with the key (index is filled while loading the rules)
+        await _sheets(get_rules, client, SPREADSHEET_ID)
+        row = _rules_rows.get(rule_key)
+        if row is None:
             await message.answer(f"❌ Regel '{rule_key}' wurde im Sheet nicht gefunden.")
             await state.clear()
             return
             
-        row = cells[0].row
         # In newer gspread versions update_cell is still fine but update is safer.
-        rules_sheet.update_cell(row, 2, new_val)
+        await _sheets(rules_sheet.update_cell, row, 2, new_val)
+        get_rules.cache_clear()
+        get_score_rules.cache_clear()
         
         # After updating rule we should refresh the dashboard so changes reflect
-        players = get_players_from_dashboard(client, SPREADSHEET_ID)
-        update_dashboard(client, SPREADSHEET_ID, players)
+        players = await _sheets(get_players_from_dashboard, client, SPREADSHEET_ID)
+        await _sheets(update_dashboard, client, SPREADSHEET_ID, players)
         
         await message.answer(f"✅ Die Regel **{format_rule_name(rule_key)}** wurde auf `{new_val}` aktualisiert!", reply_markup=get_main_menu())
         await state.clear()
@@ -1143,9 +1648,42 @@ async def handle_rule_value_input(message: types.Message, state: FSMContext):
 async def handle_admin_cancel(callback: types.CallbackQuery):
     await callback.message.edit_text("Vorgang abgebrochen.")
 
+async def run_webhook():
+    # Telegram pushes updates to us; each one is handled in the background so the
+    # HTTP response goes out immediately and the next update can be accepted
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, handle_in_background=True, secret_token=WEBHOOK_SECRET).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    await bot.set_webhook(f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}", secret_token=WEBHOOK_SECRET,
+                          allowed_updates=dp.resolve_used_update_types())
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", PORT).start()
+    logger.info(f"Webhook listening on port {PORT}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
 async def main():
     logger.info("Bot starting...")
-    await dp.start_polling(bot)
+    # Cap the number of parallel Sheets requests issued through _sheets()
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=SHEETS_WORKERS))
+    try:
+        # Fetch the bot's own user once; bot.me() serves it from memory afterwards
+        await bot.me()
+        if WEBHOOK_URL:
+            await run_webhook()
+        else:
+            await bot.delete_webhook()
+            # Long-poll close to Telegram's maximum and only ask for the update types we handle
+            await dp.start_polling(bot, polling_timeout=25, allowed_updates=dp.resolve_used_update_types())
+    finally:
+        await bot.session.close() # No-op if polling/webhook shutdown already closed it
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if uvloop:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
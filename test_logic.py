@@ -1,6 +1,8 @@
+import numpy as np
+
 def calculate_points(game_data, rules, players):
     base = int(rules.get("BasePoint", 1))
-    multiplier = 2 ** game_data.get("announcements", 0)
+    multiplier = 1 << game_data.get("announcements", 0)
     round_points = (base + game_data.get("special_points", 0)) * multiplier
     
     scores = {p: 0 for p in players}
@@ -30,6 +32,38 @@ def calculate_points(game_data, rules, players):
             
     return scores
 
+def calculate_points_batch(games, rules, players):
+    # Vectorized calculate_points for many rounds at once: returns an (n_games, n_players) int matrix.
+    # Team membership is a bool mask (Re players, or the soloist), everything else one value per game.
+    base = int(rules.get("BasePoint", 1))
+    solo_mult = int(rules.get("SoloMultiplier", 3))
+    idx = {p: i for i, p in enumerate(players)}
+    n = len(games)
+
+    mask = np.zeros((n, len(players)), dtype=bool)
+    is_solo = np.zeros(n, dtype=bool)
+    valid = np.zeros(n, dtype=bool)
+    wins = np.zeros(n, dtype=bool)
+    for g, game in enumerate(games):
+        if game["type"] == "Normal":
+            mask[g, [idx[p] for p in game["re_players"]]] = True
+            wins[g] = game["winner_team"] == "Re"
+        elif game["type"] == "Solo":
+            mask[g, idx[game["soloist"]]] = True
+            wins[g] = game["winner_team"] == "Soloist"
+            is_solo[g] = True
+        else:
+            continue
+        valid[g] = True
+
+    anns = np.array([game.get("announcements", 0) for game in games], dtype=np.int64)
+    special = np.array([game.get("special_points", 0) for game in games], dtype=np.int64)
+    round_pts = (base + special) << anns
+    sign = np.where(wins, 1, -1)
+    team_mult = np.where(is_solo, solo_mult, 1)
+    scores = np.where(mask, (sign * team_mult)[:, None], -sign[:, None]) * round_pts[:, None]
+    return np.where(valid[:, None], scores, 0)
+
 if __name__ == "__main__":
     players = ["A", "B", "C", "D"]
     rules = {"BasePoint": 1, "SoloMultiplier": 3}
@@ -54,3 +88,15 @@ if __name__ == "__main__":
         "announcements": 0, "special_points": 1
     }, rules, players)
     print(f"Solo Loss (Base 1, Spec 1 -> Total 2 -> A gets -6, others 2): {res3} (Sum: {sum(res3.values())})")
+    
+    # Batch scorer must match the per-round scorer
+    games = [
+        {"type": "Normal", "winner_team": "Re", "re_players": ["A", "B"], "announcements": 1, "special_points": 2},
+        {"type": "Normal", "winner_team": "Kontra", "re_players": ["A", "C"], "announcements": 0, "special_points": 0},
+        {"type": "Solo", "winner_team": "Soloist", "soloist": "A", "announcements": 0, "special_points": 0},
+        {"type": "Solo", "winner_team": "Others", "soloist": "D", "announcements": 2, "special_points": 1},
+    ]
+    batch = calculate_points_batch(games, rules, players)
+    expected = [[calculate_points(g, rules, players)[p] for p in players] for g in games]
+    assert batch.tolist() == expected, f"Batch scorer mismatch: {batch.tolist()} != {expected}"
+    print(f"Batch scorer matches (Totals: {batch.sum(axis=0).tolist()})")